@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Benchmark of hah.py on synthetic Auction Lists
+# Every Phase of a Run is timed separately, fully offline (file:// URLs and the dummy Provider)
+import argparse
+import json
+import os
+import sys
+import time
+import random
+import tempfile
+import subprocess
+import contextlib
+import platform
+import resource
+import tracemalloc
+
+# hah.py is in the same Folder
+import hah
+
+# Imported lazily by hah.py: loaded here so that the first Import is not timed as part of the Render Phase
+import html2text
+import texttable
+
+# Values seen on the Auction
+CPUS = ["Intel Core i7-6700", "Intel Core i7-7700", "Intel Core i7-8700", "Intel Core i9-9900K", "Intel Core i9-12900K",
+        "Intel Xeon E3-1245V2", "Intel Xeon E3-1275V6", "Intel Xeon E5-1650V3", "Intel Xeon W-2145", "Intel Xeon W-2295",
+        "AMD Ryzen 5 3600", "AMD Ryzen 7 3700X", "AMD Ryzen 7 PRO 3700", "AMD Ryzen 9 3900", "AMD Ryzen 9 5950X",
+        "AMD EPYC 7401P", "AMD EPYC 7502P", "AMD EPYC 7443P"]
+DATACENTERS = ["FSN1-DC1", "FSN1-DC5", "FSN1-DC8", "FSN1-DC14", "FSN1-DC15", "NBG1-DC1", "NBG1-DC3", "NBG1-DC4", "HEL1-DC2", "HEL1-DC6", "HEL1-DC7"]
+RAM_SIZES = [16, 32, 64, 128, 256, 512]
+DISK_SIZES = {"nvme": [512, 960, 1920, 3840, 7680], "sata": [240, 480, 960, 1920, 3840], "hdd": [2048, 3072, 4096, 8192, 10240, 16384, 22528]}
+SPECIALS = {"ECC": 0.35, "HWR": 0.1, "RPS": 0.1, "GPU": 0.02, "IPv4": 0.3, "iNIC": 0.15}
+
+# Criteria evaluated in the Criteria, Dedup, Render and Notify Phases (from search.sh.example)
+SEARCHES = {"cheap": "--price 40 --ram 64",
+            "storage": "--price 80 --disk-hdd-total-size 16000 --ecc",
+            "quick": "--price 60 --disk-quick --disk-quick-count 2 --dc FSN",
+            "epyc": "--match-cpu epyc,ryzen --exclude-cpu 3600 --price 120 --ram 128"}
+
+# Modules of the Notification and Rendering Stack: a Run without Matches must not import them
+STARTUP_EXCLUDED_MODULES = ["notifiers", "html2text", "texttable"]
+
+# Startup is measured several Times and the fastest Run is kept (less Noise)
+STARTUP_REPEAT = 5
+
+
+def generate_server(rng, server_id, now):
+    # Disks: each Type with a Probability, at least one Disk
+    disk_map = {"nvme": [], "sata": [], "hdd": [], "general": []}
+    for disk_type in ["nvme", "sata", "hdd"]:
+        if rng.random() < 0.45:
+            disk_map[disk_type] = [rng.choice(DISK_SIZES[disk_type])] * rng.choice([1, 2, 2, 2, 4, 8, 10, 15])
+    if len(disk_map["nvme"]) + len(disk_map["sata"]) + len(disk_map["hdd"]) == 0:
+        disk_map["hdd"] = [rng.choice(DISK_SIZES["hdd"])] * 2
+    disk_map["general"] = sorted(disk_map["hdd"] + disk_map["sata"] + disk_map["nvme"], reverse=True)
+
+    cpu = rng.choice(CPUS)
+    ram_size = rng.choice(RAM_SIZES)
+    price = round(rng.uniform(28, 350), 4)
+    specials = [special for special, probability in SPECIALS.items() if rng.random() < probability]
+    fixed_price = rng.random() < 0.2
+
+    # Same Shape as the Description of the real Auction List
+    description = [cpu, f"{len(disk_map['general']) // 2 or 1}x RAM {ram_size * 1024 // 4} MB DDR4"]
+    for disk_type, label in [("nvme", "SSD M.2 NVMe"), ("sata", "SSD SATA"), ("hdd", "HDD SATA")]:
+        if len(disk_map[disk_type]) > 0:
+            description.append(f"{len(disk_map[disk_type])}x {label} {disk_map[disk_type][0]} GB")
+    description.append("NIC 1 Gbit Intel I210")
+
+    next_reduce = 0 if fixed_price else rng.randint(60, 86400)
+
+    return {"id": server_id, "key": server_id, "name": "SB", "description": description, "information": [],
+            "cpu": cpu, "cpu_count": 2 if rng.random() < 0.05 else 1, "is_highio": False, "traffic": "unlimited", "bandwidth": 1000,
+            "ram": [f"{ram_size} GB"], "ram_size": ram_size, "price": price, "setup_price": 0, "hourly_price": round(price / 720, 4),
+            "hdd_arr": [], "hdd_hr": [f"{len(disk_map['general'])}x {disk_map['general'][0]} GB"],
+            "hdd_size": disk_map["general"][0], "hdd_count": len(disk_map["general"]), "serverDiskData": disk_map,
+            "is_ecc": "ECC" in specials, "datacenter": rng.choice(DATACENTERS), "specials": specials, "dist": [],
+            "fixed_price": fixed_price, "next_reduce": next_reduce, "next_reduce_hr": False,
+            "next_reduce_timestamp": now + next_reduce if next_reduce else 0}
+
+
+def generate_feed(size, seed):
+    rng = random.Random(seed)
+    now = int(time.time())
+    servers = [generate_server(rng, 1000000 + i * 7 + rng.randint(0, 6), now) for i in range(size)]
+    return {"server": servers, "serverCount": size}
+
+
+def get_commit():
+    # Results are compared across Commits
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        return result.stdout.decode("utf-8").strip() or None
+    except OSError:
+        return None
+
+
+class Phases:
+    # Time (and optionally Memory) of each Phase
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.results = []
+
+    @contextlib.contextmanager
+    def measure(self, name, items):
+        if self.trace_memory:
+            tracemalloc.start()
+
+        started = time.perf_counter()
+        yield
+        seconds = time.perf_counter() - started
+
+        peak = None
+        if self.trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        self.results.append({"phase": name, "seconds": seconds, "items": items, "peak_bytes": peak})
+
+
+def run_benchmark(size, seed, workdir, trace_memory=False, end_to_end=False):
+    phases = Phases(trace_memory)
+
+    # The Feed is written once per Size and Seed and reused
+    feed_filename = os.path.join(os.path.abspath(workdir), f"feed-{size}-{seed}.json")
+    if not os.path.exists(feed_filename):
+        with open(feed_filename, "w") as f:
+            json.dump(generate_feed(size, seed), f)
+
+    # Searches are parsed exactly like on the Command Line
+    parser = hah.get_parser()
+    searches = [hah.Search(label, parser.parse_args(criteria.split()), None, test_mode=True) for label, criteria in SEARCHES.items()]
+
+    session = hah.get_session()
+    with phases.measure("download", size):
+        body, digest = hah.download_feed(session, f"file://{feed_filename}")
+
+    with phases.measure("parse", size):
+        servers = hah.parse_servers(body)
+    del body
+
+    with phases.measure("analysis", size):
+        analyses = [hah.Analysis(server_raw, 19) for server_raw in servers]
+
+    # Initialize Variable
+    matches = dict()
+
+    with phases.measure("criteria", size * len(searches)):
+        for search in searches:
+            matches[search.label] = [analysis for analysis in analyses if search.plan.matches(analysis)]
+
+    # Half of the Matches were already processed in a previous Run
+    store = hah.StateStore(os.path.join(workdir, f"state-{size}-{seed}.db"))
+    for search in searches:
+        store.mark_processed(search.label, [(analysis.id, analysis.price) for analysis in matches[search.label][::2]])
+
+    match_count = sum(len(found) for found in matches.values())
+    with phases.measure("dedup", match_count):
+        for search in searches:
+            processed = store.get_processed(search.label, [analysis.id for analysis in matches[search.label]])
+            matches[search.label] = [analysis for analysis in matches[search.label] if analysis.id not in processed]
+    store.close()
+
+    new_count = sum(len(found) for found in matches.values())
+
+    # Messages rendered for a previous (smaller) Feed with the same Seed would be reused
+    hah.MESSAGE_CACHE.clear()
+    with phases.measure("render", new_count):
+        for found in matches.values():
+            for analysis in found:
+                analysis.get_header()
+                analysis.get_message(html=True, verbose=False)
+                analysis.get_message(html=False, verbose=False)
+
+    with phases.measure("notify", new_count):
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for found in matches.values():
+                for analysis in found:
+                    hah.send_notification(None, analysis, False)
+
+    # Complete Run of hah.py in a new Process (includes Startup and Imports)
+    if end_to_end:
+        hah_filename = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hah.py")
+        with phases.measure("end_to_end", size):
+            subprocess.run([sys.executable, hah_filename, "--data-url", f"file://{feed_filename}", "--test-mode", "--quiet",
+                            *SEARCHES["cheap"].split()], stdout=subprocess.DEVNULL, check=True)
+
+    return {"size": size, "seed": seed, "memory": trace_memory, "matches": match_count, "new_matches": new_count, "phases": phases.results}
+
+
+def measure_startup(size, seed, workdir):
+    # Complete Run of hah.py in a new Process on an Auction List of the requested Size where nothing matches
+    # Python reports the Import Time of every Module (-X importtime) on stderr
+    feed_filename = os.path.join(os.path.abspath(workdir), f"feed-{size}-{seed}.json")
+    if not os.path.exists(feed_filename):
+        with open(feed_filename, "w") as f:
+            json.dump(generate_feed(size, seed), f)
+
+    hah_filename = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hah.py")
+
+    # Initialize Variable
+    best = None
+
+    for repeat in range(STARTUP_REPEAT):
+        started = time.perf_counter()
+        process = subprocess.run([sys.executable, "-X", "importtime", hah_filename, "--data-url", f"file://{feed_filename}",
+                                  "--test-mode", "--quiet", "--price", "1"],
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True)
+        seconds = time.perf_counter() - started
+
+        # import time: self [us] | cumulative | imported package
+        modules = dict()
+        for line in process.stderr.decode("utf-8").splitlines():
+            if line.startswith("import time:") and "imported package" not in line:
+                self_us, cumulative_us, name = line[len("import time:"):].split("|")
+                modules[name.strip()] = int(self_us)
+
+        if best is None or seconds < best["seconds"]:
+            best = {"size": size, "seconds": seconds, "import_seconds": sum(modules.values()) / 1000000, "modules": len(modules),
+                    "excluded_modules": [name for name in STARTUP_EXCLUDED_MODULES if name in modules]}
+
+    return best
+
+
+def print_startup(startup, previous=None):
+    line = f"Startup (no match, {startup['size']} server(s)): {startup['seconds']*1000:.1f} ms, imports {startup['import_seconds']*1000:.1f} ms ({startup['modules']} modules)"
+    if previous is not None and previous["startup"]["seconds"] > 0:
+        line += f"  ({startup['seconds']/previous['startup']['seconds']:.2f}x vs {previous['commit']})"
+    print(line)
+
+    if len(startup["excluded_modules"]) > 0:
+        print(f"  Loaded although nothing matched: {', '.join(startup['excluded_modules'])}")
+
+
+def load_previous_startup(results_filename, size):
+    # Latest saved Startup Measurement of the same Size (older Measurements without Size used 100 Servers)
+    previous = None
+    try:
+        with open(results_filename) as f:
+            for line in f:
+                record = json.loads(line)
+                if record.get("startup") is not None and record["startup"].get("size", 100) == size:
+                    previous = record
+    except OSError:
+        pass
+
+    return previous
+
+
+def print_result(result, previous=None):
+    print(f"Feed: {result['size']} server(s), {result['matches']} match(es), {result['new_matches']} new")
+
+    # Phases of the previous comparable Result
+    previous_phases = {phase["phase"]: phase for phase in previous["phases"]} if previous else dict()
+
+    for phase in result["phases"]:
+        line = f"  {phase['phase']:<12} {phase['seconds']*1000:10.1f} ms {phase['items']/phase['seconds'] if phase['seconds'] > 0 else 0:14.0f} items/s"
+        if phase["peak_bytes"] is not None:
+            line += f" {phase['peak_bytes']/1024/1024:9.1f} MB peak"
+        if phase["phase"] in previous_phases and previous_phases[phase["phase"]]["seconds"] > 0:
+            line += f"  ({phase['seconds']/previous_phases[phase['phase']]['seconds']:.2f}x vs {previous['commit']})"
+        print(line)
+
+
+def load_previous(results_filename, size, seed, memory):
+    # Latest saved Result for the same Size and Seed (Timings with traced Memory are not comparable to the others)
+    previous = None
+    try:
+        with open(results_filename) as f:
+            for line in f:
+                record = json.loads(line)
+                for result in record["results"]:
+                    if result["size"] == size and result["seed"] == seed and result.get("memory", False) == memory:
+                        previous = {**result, "commit": record.get("commit")}
+    except OSError:
+        pass
+
+    return previous
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(description='bench.py -- benchmark of hah.py on synthetic auction lists (offline)')
+
+    parser.add_argument('--size', dest='size' , nargs='+', required=False, type=int,
+                        default=[1000, 10000, 100000],
+                        help='number of servers in the synthetic auction lists (default 1000 10000 100000)')
+
+    parser.add_argument('--seed', dest='seed' , nargs=1, required=False, type=int,
+                        default=[1],
+                        help='random seed of the generator (default 1)')
+
+    parser.add_argument('--workdir', dest='workdir' , nargs=1, required=False, type=str,
+                        help='folder for the generated auction lists (default: a temporary folder)')
+
+    parser.add_argument('--memory', dest='memory' , action='store_true',
+                        help='trace the peak memory of each phase (slower)')
+
+    parser.add_argument('--end-to-end', dest='end_to_end' , action='store_true',
+                        help='also time a complete run of hah.py in a new process')
+
+    parser.add_argument('--results', dest='results' , nargs=1, required=False, type=str,
+                        default=['bench-results.jsonl'],
+                        help='append the results to this file and compare with the previous ones (default bench-results.jsonl)')
+
+    parser.add_argument('--startup', dest='startup' , action='store_true',
+                        help='also measure the startup of hah.py on the first --size (run without matches, python -X importtime)')
+
+    parser.add_argument('--startup-budget', dest='startup_budget' , nargs=1, required=False, type=float,
+                        help='exit with an error if the startup takes longer than this many milliseconds or loads the notification stack (implies --startup)')
+
+    parser.add_argument('--generate', dest='generate' , nargs=1, required=False, type=str,
+                        help='only write a synthetic auction list of --size servers to this file and exit')
+
+    return parser
+
+
+if __name__ == "__main__":
+    cli_args = get_parser().parse_args()
+
+    # Only generate a Feed (e.g. for manual Tests with --data-url file://...)
+    if cli_args.generate:
+        with open(cli_args.generate[0], "w") as f:
+            json.dump(generate_feed(cli_args.size[0], cli_args.seed[0]), f)
+        exit(0)
+
+    # Nothing of hah.py is printed while benchmarking
+    hah.PRINT_VERBOSE = False
+    hah.PRINT_DEBUG = False
+
+    with contextlib.ExitStack() as stack:
+        workdir = cli_args.workdir[0] if cli_args.workdir else stack.enter_context(tempfile.TemporaryDirectory(prefix="hah-bench-"))
+        os.makedirs(workdir, exist_ok=True)
+
+        # Initialize Variable
+        results = []
+        startup = None
+
+        if cli_args.startup or cli_args.startup_budget:
+            startup = measure_startup(cli_args.size[0], cli_args.seed[0], workdir)
+            print_startup(startup, load_previous_startup(cli_args.results[0], cli_args.size[0]))
+
+        for size in cli_args.size:
+            result = run_benchmark(size, cli_args.seed[0], workdir, trace_memory=cli_args.memory, end_to_end=cli_args.end_to_end)
+            print_result(result, load_previous(cli_args.results[0], size, cli_args.seed[0], cli_args.memory))
+            results.append(result)
+
+    print(f"Max RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024:.1f} MB")
+
+    # One Line per Benchmark Run
+    record = {"timestamp": int(time.time()), "commit": get_commit(), "python": platform.python_version(),
+              "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, "startup": startup, "results": results}
+    with open(cli_args.results[0], "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+    # Startup Budget (e.g. in CI)
+    if cli_args.startup_budget:
+        # Initialize Variable
+        failed = False
+
+        if startup["seconds"] * 1000 > cli_args.startup_budget[0]:
+            print(f"Startup budget of {cli_args.startup_budget[0]:.0f} ms exceeded ({startup['seconds']*1000:.1f} ms)")
+            failed = True
+
+        if len(startup["excluded_modules"]) > 0:
+            print(f"Startup loaded excluded module(s): {', '.join(startup['excluded_modules'])}")
+            failed = True
+
+        if failed:
+            exit(1)
@@ -1,38 +1,227 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 import requests
-import requests_file
 import json
-import notifiers
 import argparse
-import html2text
 import base64
 
+# notifiers, html2text, texttable and requests_file are imported where they are needed,
+# so that a Run without Matches (or in Test Mode) does not pay for loading them
+
 # Import sys Python Module
 import sys
 
 # Import os Python Module
 import os
 
-# Import SubProcess Module
-import subprocess
-
-# Use TextTable
-from texttable import Texttable
+# Terminal Width
+import shutil
 
 # Use SQLite3
 import sqlite3
 
+# Split Search Criteria like a Shell would
+import shlex
+
+# Copy Analysis Objects
+import copy
+
+# Timestamps
+import time
+
+# Feed Cache (Hashing, Compression, atomic Writes and Locking)
+import hashlib
+import gzip
+import tempfile
+import fcntl
+
+# Server Fingerprints
+import zlib
+
+# Streaming Parser
+import codecs
+
+# Concurrent Notifications
+import threading
+import collections
+import concurrent.futures
+
+# Watch Mode (Jitter and clean Shutdown)
+import random
+import signal
+
+# Snapshot Timestamps in File Names
+import re
+
+# Run Metrics (timed Phases)
+import contextlib
+
+# Best Matches by Value (--rank)
+import heapq
+
+# Machine-readable Output (--output csv)
+import csv
+
+# Binary Auction List (memory-mapped)
+import mmap
+
+# Size of the Chunks used to read / stream the Auction List
+FEED_CHUNK_SIZE = 64*1024
+
+# Maximum Message Length of Notifiers Providers (Digests are split into several Messages above this)
+PROVIDER_MESSAGE_LIMITS = {"pushover": 1024, "telegram": 4096, "simplepush": 1024, "join": 4096, "twilio": 1600,
+                           "slack": 40000, "zulip": 10000, "gitter": 65536, "pushbullet": 65536, "pagerduty": 1024}
+
+# Room left in each Digest Message for its Header
+DIGEST_HEADER_RESERVE = 128
+
+# Define Command Line Options that influence which Servers match
+CRITERIA_OPTIONS = ["id", "datacenter", "price", "tax_percent", "exclude_tax", "cpu_count", "ram_size",
+                    "match_cpu_description", "exclude_cpu_description", "cpu_word", "cpu_regex",
+                    "disk_general_count", "disk_general_total_size", "disk_general_each_size",
+                    "disk_quick", "disk_quick_count", "disk_quick_total_size", "disk_quick_each_size",
+                    "disk_hdd", "disk_hdd_count", "disk_hdd_total_size", "disk_hdd_each_size",
+                    "disk_ssd", "disk_ssd_count", "disk_ssd_total_size", "disk_ssd_each_size",
+                    "disk_nvme", "disk_nvme_count", "disk_nvme_total_size", "disk_nvme_each_size",
+                    "sp_hw_raid", "sp_red_psu", "sp_ecc", "sp_gpu", "sp_ipv4", "sp_inic", "rank", "top"]
+
 # Define Output Text Control Variables
 PRINT_DEBUG = True
 PRINT_VERBOSE = True
 
+# Output from concurrent Notifications is printed under this Lock
+PRINT_LOCK = threading.Lock()
+
+# Records of the Matches (--output jsonl / csv), None for the Text Output
+OUTPUT_WRITER = None
+
+# Maximum Number of rendered Messages kept in the Message Cache
+MESSAGE_CACHE_SIZE = 1024
+
+
+# Define Message Cache Class
+# Rendered Messages by (Server ID, Price, Format, Verbosity), shared by all Searches and Providers
+# The least recently used Message is evicted first
+class MessageCache:
+    def __init__(self, size=MESSAGE_CACHE_SIZE):
+        self.size = size
+        self.messages = collections.OrderedDict()
+
+        # Messages are rendered by the Dispatcher Threads
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            message = self.messages.get(key)
+            if message is not None:
+                self.messages.move_to_end(key)
+            return message
+
+    def put(self, key, message):
+        with self.lock:
+            self.messages[key] = message
+            self.messages.move_to_end(key)
+            if len(self.messages) > self.size:
+                self.messages.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.messages.clear()
+
+
+MESSAGE_CACHE = MessageCache()
+
+# Capabilities of each Notifiers Provider: (Arguments to send HTML or None, Name of the Title Argument or None)
+PROVIDER_CAPABILITIES = dict()
+
+# Specials of a Server: Property, Name in the Auction List and Bit in the Specials Column (--engine numpy / --feed-binary)
+SERVER_SPECIALS = {"sp_hw_raid": ("HWR", 1), "sp_red_psu": ("RPS", 2), "sp_ecc": ("ECC", 4),
+                   "sp_gpu": ("GPU", 8), "sp_ipv4": ("IPv4", 16), "sp_inic": ("iNIC", 32)}
+
 
 # Define Server Class
 class Server:
     # Exclude Properties from Printing / Analysis
     SERVER_PRINT_EXCLUDE_PROPERTIES = ["server_raw"]
 
+    # Disk Properties are only computed (all at once) when one of them is needed
+    SERVER_DISK_FIELDS = ["disk_general_count", "disk_general_total_size", "disk_general_each_size",
+                          "disk_quick", "disk_quick_count", "disk_quick_total_size", "disk_quick_each_size",
+                          "disk_hdd", "disk_hdd_count", "disk_hdd_total_size", "disk_hdd_each_size",
+                          "disk_ssd", "disk_ssd_count", "disk_ssd_total_size", "disk_ssd_each_size",
+                          "disk_nvme", "disk_nvme_count", "disk_nvme_total_size", "disk_nvme_each_size"]
+
+    # Properties of the Server (in Display Order)
+    SERVER_FIELDS = ["tax_percent", "id", "datacenter", "price_net", "price_gross", "price",
+                     "ram_size", "ram_description", "cpu_count", "cpu_description",
+                     "disk_map", "disk_description", *SERVER_DISK_FIELDS,
+                     "sp_hw_raid", "sp_red_psu", "sp_ecc", "sp_gpu", "sp_ipv4", "sp_inic"]
+
+    # No per-Instance Dictionary, one Slot per Property
+    __slots__ = ("server_raw", *SERVER_FIELDS)
+
+    def __getattr__(self, name):
+        # Only called for Slots that are not set yet (lazily computed Properties)
+        if name in self.SERVER_DISK_FIELDS:
+            self.compute_disk_stats()
+        elif name == "disk_description":
+            self.disk_description = self.get_disk_description()
+        else:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+        return object.__getattribute__(self, name)
+
+    def __copy__(self):
+        # Copy only the Slots that are already set (do NOT trigger the lazy Computation)
+        other = object.__new__(type(self))
+        for name in type(self).get_slot_names():
+            try:
+                object.__setattr__(other, name, object.__getattribute__(self, name))
+            except AttributeError:
+                pass
+        return other
+
+    @classmethod
+    def get_slot_names(cls):
+        # Slots of the Class and of all its Parents (computed once per Class)
+        if "_slot_names" not in cls.__dict__:
+            cls._slot_names = [name for klass in cls.__mro__ for name in klass.__dict__.get("__slots__", ())]
+        return cls._slot_names
+
+    def compute_disk_stats(self):
+        # Count, Total and Smallest Size for each Disk Type in a single Pass over serverDiskData
+        # !! IMPORTANT !! Only read self.disk_map, never modify it (it is a Reference to the RAW Data)
+        stats = dict()
+        for disk_type in ["hdd", "sata", "nvme"]:
+            drive_sizes = self.disk_map.get(disk_type, [])
+            if len(drive_sizes) > 0:
+                stats[disk_type] = (len(drive_sizes), sum(drive_sizes), min(drive_sizes))
+            else:
+                stats[disk_type] = (0, 0, None)
+
+        # Combine the Disk Types the same Way as get_drive_sizes()
+        for name, disk_types in [("general", ["hdd", "sata", "nvme"]), ("quick", ["sata", "nvme"]),
+                                 ("hdd", ["hdd"]), ("ssd", ["sata"]), ("nvme", ["nvme"])]:
+            count = sum(stats[disk_type][0] for disk_type in disk_types)
+
+            # -1 if there is no Disk at all
+            if count > 0:
+                total_size = sum(stats[disk_type][1] for disk_type in disk_types)
+                each_size = min(stats[disk_type][2] for disk_type in disk_types if stats[disk_type][0] > 0)
+            else:
+                total_size = -1
+                each_size = -1
+
+            setattr(self, f"disk_{name}_count", count)
+            setattr(self, f"disk_{name}_total_size", total_size)
+            setattr(self, f"disk_{name}_each_size", each_size)
+
+        # These do not exist for "general"
+        self.disk_quick = stats["sata"][0] + stats["nvme"][0] > 0
+        self.disk_hdd = stats["hdd"][0] > 0
+        self.disk_ssd = stats["sata"][0] > 0
+        self.disk_nvme = stats["nvme"][0] > 0
+
     def computeOverallResult(self):
         # For every key in the Dictionary compute the logical AND between match and exclude
         for key in self.matchresult:
@@ -198,39 +387,8 @@ class Server:
         self.disk_map = server_raw.get(
             "serverDiskData", {"nvme": [], "sata": [], "hdd": [], "general": []})
 
-        # Store Disk Description
-        self.disk_description = self.get_disk_description()
-        
-        # These Variables keep into account the General (HDD + SSD/NVME) Disk Type
-        self.disk_general_count = self.get_disk_count('general')
-        self.disk_general_total_size = self.get_total_disk_size('general')
-        self.disk_general_each_size = self.get_smallest_disk_size('general')
-
-        # These Variables keep into account only the Quick (SSD/NVME) Disk Type only
-        self.disk_quick = self.has_quick_disk()
-        self.disk_quick_count = self.get_disk_count('quick')
-        self.disk_quick_total_size = self.get_total_disk_size('quick')
-        self.disk_quick_each_size = self.get_smallest_disk_size('quick')
-
-        # These Variables keep into account only the HDD Disk Type only
-        self.disk_hdd = self.has_hdd_disk()
-        self.disk_hdd_count = self.get_disk_count('hdd')
-        self.disk_hdd_total_size = self.get_total_disk_size('hdd')
-        self.disk_hdd_each_size = self.get_smallest_disk_size('hdd')
-
-        # These Variables keep into account only the SSD Disk Type only
-        self.disk_ssd = self.has_ssd_disk()
-        self.disk_ssd_count = self.get_disk_count('ssd')
-        self.disk_ssd_total_size = self.get_total_disk_size('ssd')
-        self.disk_ssd_each_size = self.get_smallest_disk_size('ssd')
-
-        # These Variables keep into account only the NVME Disk Type only
-        self.disk_nvme = self.has_nvme_disk()
-        self.disk_nvme_count = self.get_disk_count('nvme')
-        self.disk_nvme_total_size = self.get_total_disk_size('nvme')
-        self.disk_nvme_each_size = self.get_smallest_disk_size('nvme')
-        
-        
+        # Disk Description and Disk Properties (general / quick / hdd / ssd / nvme) are computed on first Access
+        # See compute_disk_stats()
 
         self.sp_hw_raid = False
         self.sp_red_psu = False
@@ -264,7 +422,31 @@ class Server:
         msg = f"Hetzner server #{self.id} in {self.datacenter} for {self.price}€"
         return msg
 
+    # Value Metrics (--rank): Property, Size of one Unit and Description of the Price per Unit
+    VALUE_METRICS = {"ram": ("ram_size", 1, "€/GB RAM"), "disk": ("disk_general_total_size", 1000, "€/TB disk"),
+                     "quick": ("disk_quick_total_size", 1000, "€/TB SSD/NVMe"), "core": ("cpu_count", 1, "€/CPU")}
+
+    def get_value(self, metric):
+        # Price per Unit (lower is better), infinite if the Server has none of it
+        name, unit_size, unit = self.VALUE_METRICS[metric]
+        amount = getattr(self, name) / unit_size
+        return self.price / amount if amount > 0 else float("inf")
+
     def get_message(self, html=True, verbose=True):
+        # Rendered only once per Server, Price and Format (the same Server can match several Searches and Providers)
+        key = (self.id, self.price, html, verbose)
+        msg = MESSAGE_CACHE.get(key)
+        if msg is None:
+            msg = self.render_message(html, verbose)
+            MESSAGE_CACHE.put(key, msg)
+        return msg
+
+    def render_message(self, html=True, verbose=True):
+        # The Text Version is converted from the (cached) HTML Version
+        if not html:
+            import html2text
+            return html2text.html2text(self.get_message(html=True, verbose=verbose))
+
         url = self.get_url()
         msg = f"<b>Hetzner</b> server #{self.id} in {self.datacenter} for {self.price}€: <br />" + \
               f"<b>{self.ram_size}GB RAM, {self.cpu_count}x {self.cpu_description}</b>, {self.disk_description}<br />" + \
@@ -272,8 +454,6 @@ class Server:
         if verbose:
             json_raw = json.dumps(self.server_raw)
             msg += f"<br /><u>Details</u>:<br /><pre>{json_raw}</pre><br />"
-        if not html:
-            msg = html2text.html2text(msg)
         return msg
 
     def __repr__(self):
@@ -281,11 +461,11 @@ class Server:
         excludeProperties = SERVER_PRINT_EXCLUDE_PROPERTIES
 
         # Initialize Table
+        from texttable import Texttable
         t = Texttable()
 
         # Get Terminal Width
-        cmdResult = subprocess.run("TERM=dumb tput cols" , stdout=subprocess.PIPE , shell=True)
-        terminalColumns = int(cmdResult.stdout.decode('utf-8'))
+        terminalColumns = shutil.get_terminal_size().columns
 
         # Set Maximum Width for the Table
         t.set_max_width(terminalColumns*0.8)
@@ -297,12 +477,12 @@ class Server:
         header = ["Property" , "Value"]
 
         # Loop over Class Properties
-        for property in self.__dict__:
+        for property in self.SERVER_FIELDS:
             # Name is the same as property
             name = property
 
             # Check if Property exists in Class
-            if property in self.__dict__:
+            if property in self.SERVER_FIELDS:
                 value = getattr(self, property)
             else:
                 value = None
@@ -333,6 +513,16 @@ class Analysis(Server):
     ANALYSIS_FIELDS_NAME = ["matchcriteria" , "excludecriteria" , "matchresult" , "excluderesult" , "overallresult"]
     ANALYSIS_FIELDS_DESCRIPTION = ["Matching Criteria" , "Exclusion Criteria" , "Match Result" , "Exclude Result" , "Overall Result"]
 
+    __slots__ = ("matchcriteria" , "excludecriteria" , "matchresult" , "excluderesult" , "overallresult")
+
+    def __getattr__(self, name):
+        # The per-Property Dictionaries are only built when they are needed (Debugging / Verbose Output)
+        if name in self.ANALYSIS_FIELDS_NAME:
+            self.reset_criteria()
+            return object.__getattribute__(self, name)
+
+        return Server.__getattr__(self, name)
+
     def __init__(self, server_raw , tax_percent=0):
         # Call Parent Class Constructor
         Server.__init__(self, server_raw , tax_percent)
@@ -343,13 +533,17 @@ class Analysis(Server):
         # self.matchresult: tells if the match criteria is satisfied
         # self.excluderesult: tells if the the excluding criteria is satisfied
         # self.overallresult: tells if the match criteria is satisfied
+        # These are built on first Access (see __getattr__) or by reset_criteria()
+
+    def reset_criteria(self):
+        # Always create new Dictionaries (do NOT clear them), so that Snapshots taken before keep their own Results
         self.matchcriteria = dict()
         self.excludecriteria = dict()
         self.matchresult = dict()
         self.excluderesult = dict()
         self.overallresult = dict()
 
-        for property in self.__dict__:
+        for property in self.SERVER_FIELDS:
             name = property
 
             # Exclude the new Fields that we aree introducting
@@ -363,16 +557,34 @@ class Analysis(Server):
                 self.excluderesult[name] = True
                 self.overallresult[name] = True
 
+    def snapshot(self):
+        # Shallow Copy is enough since reset_criteria() replaces the Dictionaries instead of modifying them
+        # See Server.__copy__()
+        return copy.copy(self)
+
+    def get_record(self, plan):
+        # Compact Record of a Match for --output (no Table Layout)
+        # Only the Criteria that the Search actually checks (see CriteriaPlan) are listed, with their Overall Result
+        criteria = {name: self.overallresult[name] for name in self.matchcriteria if name in plan.criteria}
+
+        return {"id": self.id, "price": self.price, "datacenter": self.datacenter,
+                "cpu": self.cpu_description, "cpu_count": self.cpu_count,
+                "ram": self.ram_size, "ram_description": self.ram_description,
+                "disk": self.disk_description, "disk_count": self.disk_general_count,
+                "disk_total_size": self.disk_general_total_size, "disk_quick_total_size": self.disk_quick_total_size,
+                "specials": [code for name, (code, bit) in SERVER_SPECIALS.items() if getattr(self, name)],
+                "url": self.get_url(), "criteria": criteria}
+
     def __repr__(self):
         # Define Properties to Exclude from Print
         excludeProperties = ["server_raw" , *self.ANALYSIS_FIELDS_NAME]
 
         # Initialize Table
+        from texttable import Texttable
         t = Texttable()
 
         # Get Terminal Width
-        cmdResult = subprocess.run("TERM=dumb tput cols" , stdout=subprocess.PIPE , shell=True)
-        terminalColumns = int(cmdResult.stdout.decode('utf-8'))
+        terminalColumns = shutil.get_terminal_size().columns
 
         # Set Maximum Width for the Table
         t.set_max_width(terminalColumns*0.8)
@@ -390,7 +602,7 @@ class Analysis(Server):
             name = property
 
             # Check if Property exists in Class
-            if property in self.__dict__:
+            if property in self.SERVER_FIELDS:
                 value = getattr(self, property)
             else:
                 value = None
@@ -445,47 +657,79 @@ class Analysis(Server):
         return '\t'.join(('\n'+str.lstrip()).splitlines(True))
 
 def send_notification(notifier, server, send_payload):
+    # Returns True if the Notification was sent successfully
     if notifier == None:
-        print(f"DUMMY NOTIFICATION TITLE: "+server.get_header())
         msg = server.get_message(
             html=False, verbose=send_payload).encode("utf-8")
         msg_base64 = base64.b64encode(msg).decode("utf-8")
-        print(f"DUMMY NOTIFICATION BODY:  {msg_base64}")
+
+        # Notifications can be sent from several Threads, so print each one at once
+        with PRINT_LOCK:
+            print(f"DUMMY NOTIFICATION TITLE: "+server.get_header())
+            print(f"DUMMY NOTIFICATION BODY:  {msg_base64}")
+
+        return True
     else:
-        html_html = notifier.schema.get("properties").get("html")
-        html_pamo = notifier.schema.get("properties").get("parse_mode")
-        html_supported = html_html or html_pamo
+        # Only the Format the Provider supports is rendered
+        html_arguments, title_argument = get_provider_capabilities(notifier)
+        if html_arguments is not None:
+            return notify_provider(notifier, server.get_header(), server.get_message(html=True, verbose=send_payload))
+        else:
+            return notify_provider(notifier, server.get_header(), None, server.get_message(html=False, verbose=send_payload))
 
-        title_subject = notifier.schema.get("properties").get("subject")
-        title_title = notifier.schema.get("properties").get("title")
 
-        msg = server.get_message(html=html_supported, verbose=send_payload)
-        title = server.get_header()
+def get_provider_capabilities(notifier):
+    # The Schema of a Provider is only inspected once
+    capabilities = PROVIDER_CAPABILITIES.get(notifier.name)
+    if capabilities is None:
+        properties = notifier.schema.get("properties")
 
-        if html_html:
-            if title_subject:
-                response = notifier.notify(message=msg, html=True, subject=title)
-            elif title_title:
-                response = notifier.notify(message=msg, html=True, title=title)
-            else:
-                response = notifier.notify(message=msg, html=True)
-        elif html_pamo:
-            if title_subject:
-                response = notifier.notify(message=msg, parse_mode="html", subject=title)
-            elif title_title:
-                response = notifier.notify(message=msg, parse_mode="html", title=title)
-            else:
-                response = notifier.notify(message=msg, parse_mode="html")
+        # HTML is either a Flag or a Parse Mode
+        if properties.get("html"):
+            html_arguments = {"html": True}
+        elif properties.get("parse_mode"):
+            html_arguments = {"parse_mode": "html"}
         else:
-            if title_subject:
-                response = notifier.notify(message=msg, subject=title)
-            elif title_title:
-                response = notifier.notify(message=msg, title=title)
-            else:
-                response = notifier.notify(message=msg)
+            html_arguments = None
 
-        
+        # Title is either the Subject or the Title
+        if properties.get("subject"):
+            title_argument = "subject"
+        elif properties.get("title"):
+            title_argument = "title"
+        else:
+            title_argument = None
+
+        capabilities = (html_arguments, title_argument)
+        PROVIDER_CAPABILITIES[notifier.name] = capabilities
+
+    return capabilities
+
+
+def notify_provider(notifier, title, html_message, text_message=None):
+    # Send a Message through a Notifiers Provider, using HTML and Title/Subject if the Provider supports them
+    # Returns True if the Message was sent successfully
+    html_arguments, title_argument = get_provider_capabilities(notifier)
+
+    # Providers without HTML Support get the Text Version of the Message
+    if html_arguments is not None:
+        msg = html_message
+        arguments = dict(html_arguments)
+    else:
+        if text_message is not None:
+            msg = text_message
+        else:
+            import html2text
+            msg = html2text.html2text(html_message)
+        arguments = dict()
+
+    if title_argument is not None:
+        arguments[title_argument] = title
 
+    response = notifier.notify(message=msg, **arguments)
+
+    # Notifications can be sent from several Threads, so print each one at once
+    with PRINT_LOCK:
         if not response.ok:
             print(f"ERROR SENDING NOTIFICATION")
             print(f"\tProvider: {response.provider}")
@@ -502,8 +746,1564 @@ def send_notification(notifier, server, send_payload):
             print(f"\tReceived Status: {response.status}")
             print(f"\tReceived Errors: {response.errors}")
 
+    return response.ok
 
-if __name__ == "__main__":
+
+def send_digest(notifier, title, html_message, text_message):
+    # Returns True if the Digest was sent successfully
+    if notifier == None:
+        msg_base64 = base64.b64encode(text_message.encode("utf-8")).decode("utf-8")
+
+        # Notifications can be sent from several Threads, so print each one at once
+        with PRINT_LOCK:
+            print(f"DUMMY NOTIFICATION TITLE: "+title)
+            print(f"DUMMY NOTIFICATION BODY:  {msg_base64}")
+
+        return True
+    else:
+        return notify_provider(notifier, title, html_message, text_message)
+
+
+def get_digest_messages(label, analyses, limit=None):
+    # One compact Line per Server, cheapest first
+    # Returns a List of (Title, HTML Message, Text Message, Servers), split into several Messages only if the Provider Limit requires it
+    analyses = sorted(analyses, key=lambda analysis: analysis.price)
+
+    # Initialize Variable
+    rows = []
+
+    for analysis in analyses:
+        url = analysis.get_url()
+        summary = f"{analysis.price:.2f}€ {analysis.datacenter} | {analysis.ram_size}GB RAM | {analysis.cpu_count}x {analysis.cpu_description} | {analysis.disk_description}"
+        html_row = f"<a href='{url}'>#{analysis.id}</a> {summary}<br />"
+        text_row = f"#{analysis.id} {summary}\n{url}\n"
+        rows.append((analysis, html_row, text_row))
+
+    # Split Rows into Chunks that fit into the Provider Limit (checked on the larger HTML Version)
+    chunks = [[]]
+    length = 0
+    for row in rows:
+        row_length = len(row[1])
+        if limit is not None and len(chunks[-1]) > 0 and length + row_length > limit - DIGEST_HEADER_RESERVE:
+            chunks.append([])
+            length = 0
+        chunks[-1].append(row)
+        length += row_length
+
+    # Initialize Variable
+    messages = []
+
+    for index, chunk in enumerate(chunks):
+        title = f"Hetzner auction: {len(analyses)} server(s) for search {label}"
+        if len(chunks) > 1:
+            title += f" ({index + 1}/{len(chunks)})"
+
+        html_message = f"<b>{title}</b><br />" + "".join(row[1] for row in chunk)
+        text_message = f"{title}\n\n" + "".join(row[2] for row in chunk)
+        messages.append((title, html_message, text_message, [row[0] for row in chunk]))
+
+    return messages
+
+
+# Define Rate Limiter Class
+# Spaces out the Calls to a Provider so that at most `rate` Calls per Second are made (0 = unlimited)
+class RateLimiter:
+    def __init__(self, rate):
+        self.interval = 1.0/rate if rate > 0 else 0.0
+        self.lock = threading.Lock()
+        self.next_time = 0.0
+
+    def wait(self):
+        if self.interval <= 0:
+            return
+
+        # Reserve the next Slot, then sleep outside of the Lock
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time)
+            self.next_time = start + self.interval
+
+        time.sleep(max(0.0, start - now))
+
+
+# Define Notification Dispatcher Class
+# Sends Notifications concurrently through a bounded Pool of Workers, with a Rate Limit per Provider
+# and Retries (exponential Backoff) for failed Notifications
+class NotificationDispatcher:
+    def __init__(self, workers=4, rate=0.0, retries=3, backoff=1.0):
+        # The Threads are only started by the first Notification (see release)
+        self.workers = max(1, workers)
+        self.executor = None
+        self.rate = rate
+        self.retries = retries
+        self.backoff = backoff
+
+        # One Rate Limiter per Provider
+        self.limiters = dict()
+        self.lock = threading.Lock()
+
+        # Latency of every Attempt is recorded here if set (RunMetrics of the current Run)
+        self.metrics = None
+
+    def get_limiter(self, provider):
+        with self.lock:
+            if provider not in self.limiters:
+                self.limiters[provider] = RateLimiter(self.rate)
+            return self.limiters[provider]
+
+    def submit(self, notifier, send, *args):
+        # send(notifier, *args) sends one Message and returns True on Success
+        # Returns a Future whose Result tells if the Message was sent
+        if self.executor is None:
+            self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers)
+        return self.executor.submit(self.deliver, notifier, send, *args)
+
+    def deliver(self, notifier, send, *args):
+        provider = notifier.name if notifier is not None else "dummy"
+        limiter = self.get_limiter(provider)
+
+        for attempt in range(self.retries + 1):
+            limiter.wait()
+
+            # Initialize Variable
+            sent = False
+
+            started = time.perf_counter()
+            try:
+                sent = send(notifier, *args)
+            except Exception as e:
+                with PRINT_LOCK:
+                    print(f"ERROR SENDING NOTIFICATION")
+                    print(f"\tProvider: {provider}")
+                    print(f"\tError: {e}")
+
+            if self.metrics is not None:
+                self.metrics.record_attempt(provider, time.perf_counter() - started, sent)
+
+            if sent:
+                return True
+
+            # Wait longer after each failed Attempt
+            if attempt < self.retries:
+                delay = self.backoff * (2 ** attempt)
+                if PRINT_DEBUG:
+                    with PRINT_LOCK:
+                        print(f"Retrying Notification via {provider} in {delay}s (Attempt {attempt + 2} of {self.retries + 1})")
+                time.sleep(delay)
+
+        return False
+
+    def release(self):
+        # Stop the idle Threads of the previous Notifications, so that the Process can fork safely (--match-workers)
+        # The next Notification starts new Threads
+        self.shutdown()
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+
+# Define Run Metrics Class
+# Duration of every Phase of a Run and Counters, written as a Prometheus Textfile (node_exporter Textfile Collector)
+# and/or appended as one JSON Line per Run
+class RunMetrics:
+    # Help Text of the Counters (exported as hah_<name>)
+    COUNTERS = {"feed_bytes": "Size of the downloaded auction list in bytes",
+                "feed_unchanged": "1 if the auction list was unchanged since the last run and not processed",
+                "servers_parsed": "Number of servers in the auction list",
+                "servers_unchanged": "Number of servers skipped since they did not change since the previous run",
+                "servers_processed": "Number of matching servers skipped since they were already notified",
+                "near_misses": "Number of servers that only miss a search by their price and are reduced later (--wake-on-reduce)"}
+
+    # Per-Search Counters (exported as hah_search_<name>{search="..."})
+    SEARCH_COUNTERS = {"matches": "Number of servers matching the search",
+                       "new": "Number of matching servers not notified before",
+                       "sent": "Number of servers whose notification was sent",
+                       "failed": "Number of servers whose notification failed"}
+
+    def __init__(self):
+        self.timestamp = time.time()
+        self.success = False
+
+        # Initialize Variables
+        self.phases = dict()
+        self.counters = {name: 0 for name in self.COUNTERS}
+        self.searches = dict()
+        self.providers = dict()
+
+        # Notifications are sent by the Dispatcher Threads
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        # Time a Phase of the Run (Phases entered several Times are summed up)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def count(self, name, value=1):
+        self.counters[name] += value
+
+    def count_items(self, items, name, size=None):
+        # Count the Items (or their Size) of an Iterator while it is being consumed (Streaming)
+        for item in items:
+            self.counters[name] += 1 if size is None else size(item)
+            yield item
+
+    def count_search(self, label, name, value):
+        if label not in self.searches:
+            self.searches[label] = {name: 0 for name in self.SEARCH_COUNTERS}
+        self.searches[label][name] += value
+
+    def record_attempt(self, provider, duration, sent):
+        with self.lock:
+            if provider not in self.providers:
+                self.providers[provider] = {"attempts": 0, "errors": 0, "latency": 0.0}
+            self.providers[provider]["attempts"] += 1
+            self.providers[provider]["latency"] += duration
+            if not sent:
+                self.providers[provider]["errors"] += 1
+
+    def get_record(self):
+        return {"timestamp": round(self.timestamp, 3), "success": self.success,
+                "duration": round(sum(self.phases.values()), 6),
+                "phases": {name: round(duration, 6) for name, duration in self.phases.items()},
+                **self.counters, "searches": self.searches,
+                "providers": {provider: {**values, "latency": round(values["latency"], 6)} for provider, values in self.providers.items()}}
+
+    @staticmethod
+    def get_label(value):
+        # Escape a Prometheus Label Value
+        return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+    def get_prometheus(self):
+        lines = []
+
+        def add_metric(name, help_text, samples):
+            lines.append(f"# HELP hah_{name} {help_text}")
+            lines.append(f"# TYPE hah_{name} gauge")
+            for labels, value in samples:
+                labels = ",".join(f'{key}="{self.get_label(label)}"' for key, label in labels.items())
+                lines.append(f"hah_{name}{{{labels}}} {value}" if labels else f"hah_{name} {value}")
+
+        add_metric("last_run_timestamp_seconds", "Start time of the last run", [({}, round(self.timestamp, 3))])
+        add_metric("last_run_success", "1 if the auction list was downloaded and processed", [({}, int(self.success))])
+        add_metric("last_run_duration_seconds", "Duration of the last run", [({}, round(sum(self.phases.values()), 6))])
+        add_metric("phase_duration_seconds", "Duration of each phase of the last run",
+                   [({"phase": name}, round(duration, 6)) for name, duration in self.phases.items()])
+
+        for name, help_text in self.COUNTERS.items():
+            add_metric(name, help_text, [({}, self.counters[name])])
+
+        for name, help_text in self.SEARCH_COUNTERS.items():
+            add_metric(f"search_{name}", help_text, [({"search": label}, values[name]) for label, values in self.searches.items()])
+
+        add_metric("notification_attempts", "Number of attempts to send a notification",
+                   [({"provider": provider}, values["attempts"]) for provider, values in self.providers.items()])
+        add_metric("notification_errors", "Number of failed attempts to send a notification",
+                   [({"provider": provider}, values["errors"]) for provider, values in self.providers.items()])
+        add_metric("notification_duration_seconds", "Time spent sending notifications (divided by the attempts: average latency)",
+                   [({"provider": provider}, round(values["latency"], 6)) for provider, values in self.providers.items()])
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, filename):
+        # node_exporter must never read a partial File
+        write_file_atomic(filename, self.get_prometheus().encode("utf-8"))
+
+    def write_json(self, filename):
+        with open(filename, "a") as f:
+            f.write(json.dumps(self.get_record(), separators=(",", ":")) + "\n")
+
+
+# Define Text State File Class
+# Legacy State: comma-separated List of processed Server IDs (e.g. /tmp/hah.txt)
+class TextStateFile:
+    def __init__(self, filename):
+        self.filename = filename
+
+        # Parse the IDs into a Set (a Substring Search would match 12345 inside 2123456)
+        with open(self.filename, 'a+') as f:
+            f.seek(0)
+            self.idsProcessed = parse_state_ids(f.read())
+
+    def get_processed(self, server_ids):
+        return {server_id for server_id in server_ids if server_id in self.idsProcessed}
+
+    def mark_processed(self, entries):
+        #  Write to File the IDs that we processed
+        with open(self.filename, 'a') as f:
+            for server_id, price in entries:
+                f.write(","+str(server_id))
+                self.idsProcessed.add(server_id)
+
+    def close(self):
+        pass
+
+
+# Define SQLite State Store Class
+# Processed Servers are indexed by (Search Label, Server ID) so that Lookups do not depend on the Size of the History
+class StateStore:
+    # Maximum Number of Parameters in a single Query (older SQLite Versions are limited to 999)
+    QUERY_CHUNK_SIZE = 900
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.connection = sqlite3.connect(filename)
+
+        # Allow other Processes to read while we write
+        self.connection.execute("PRAGMA journal_mode=WAL")
+
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS processed (
+                                       search_label TEXT NOT NULL,
+                                       server_id INTEGER NOT NULL,
+                                       price REAL,
+                                       processed_at INTEGER NOT NULL,
+                                       PRIMARY KEY (search_label, server_id)
+                                   ) WITHOUT ROWID""")
+        self.connection.commit()
+
+    def get_processed(self, label, server_ids):
+        # Initialize Variable
+        processed = set()
+
+        # One batched Query per Chunk of Candidates
+        server_ids = list(server_ids)
+        for i in range(0, len(server_ids), self.QUERY_CHUNK_SIZE):
+            chunk = server_ids[i:i+self.QUERY_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.connection.execute(f"SELECT server_id FROM processed WHERE search_label = ? AND server_id IN ({placeholders})",
+                                           [label, *chunk])
+            processed.update(row[0] for row in rows)
+
+        return processed
+
+    def mark_processed(self, label, entries):
+        # Write all Entries in one Transaction
+        now = int(time.time())
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO processed (search_label, server_id, price, processed_at) VALUES (?, ?, ?, ?)",
+                                        [(label, server_id, price, now) for server_id, price in entries])
+
+    def import_state_file(self, label, filename):
+        # One-Shot Import of a legacy State File (e.g. /tmp/hah.txt)
+        with open(filename) as f:
+            server_ids = parse_state_ids(f.read())
+
+        now = int(time.time())
+        with self.connection:
+            self.connection.executemany("INSERT OR IGNORE INTO processed (search_label, server_id, price, processed_at) VALUES (?, ?, NULL, ?)",
+                                        [(label, server_id, now) for server_id in server_ids])
+
+        return len(server_ids)
+
+    def close(self):
+        self.connection.close()
+
+
+# Define SQLite State Class
+# View of the State Store restricted to a single Search
+class SearchState:
+    def __init__(self, store, label):
+        self.store = store
+        self.label = label
+
+    def get_processed(self, server_ids):
+        return self.store.get_processed(self.label, server_ids)
+
+    def mark_processed(self, entries):
+        self.store.mark_processed(self.label, entries)
+
+    def close(self):
+        pass
+
+
+def parse_state_ids(content):
+    return {int(token) for token in content.split(",") if token.strip().isdigit()}
+
+
+def write_file_atomic(filename, data, compress=False):
+    # Write to a temporary File first, so that concurrent Readers never see a partial File
+    fd, tmp_filename = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filename)), prefix=".tmp-")
+    with os.fdopen(fd, "wb") as f:
+        if compress:
+            with gzip.GzipFile(fileobj=f, mode="wb", compresslevel=6) as gz:
+                gz.write(data)
+        else:
+            f.write(data)
+
+    # Readable by other Users / Containers sharing the File
+    os.chmod(tmp_filename, 0o644)
+    os.replace(tmp_filename, filename)
+
+
+# Define Feed Cache Class
+# Keeps the last downloaded Auction List together with its Validators (ETag / Last-Modified), so that
+# the next Download is a Conditional Request. The Cache Directory can be shared by concurrent Searches.
+class FeedCache:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get_path(self, data_url, suffix):
+        # One Set of Files per URL
+        key = hashlib.sha1(data_url.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.directory, f"{key}{suffix}")
+
+    def read_meta(self, data_url):
+        try:
+            with open(self.get_path(data_url, ".meta.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def read_body(self, data_url):
+        with gzip.open(self.get_path(data_url, ".json.gz"), "rb") as f:
+            return f.read()
+
+    def read_chunks(self, data_url):
+        # Open the cached Body right away (while still holding the Lock), then read it Chunk by Chunk
+        f = gzip.open(self.get_path(data_url, ".json.gz"), "rb")
+        return iter_file_chunks(f)
+
+    def write_chunks(self, data_url, chunks):
+        # Compress the Body to a temporary File while it is being downloaded, without keeping it in Memory
+        sha256 = hashlib.sha256()
+        fd, tmp_filename = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            with gzip.GzipFile(fileobj=f, mode="wb", compresslevel=6) as gz:
+                for chunk in chunks:
+                    sha256.update(chunk)
+                    gz.write(chunk)
+
+        # Readable by other Users / Containers sharing the Cache
+        os.chmod(tmp_filename, 0o644)
+        os.replace(tmp_filename, self.get_path(data_url, ".json.gz"))
+
+        return sha256.hexdigest()
+
+    def fetch(self, session, data_url, stream=False):
+        # Only one Process downloads at a time, the others then get a 304 (Not Modified) from the Server
+        with open(self.get_path(data_url, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            meta = self.read_meta(data_url)
+
+            # Send Validators only if the cached Body is still available
+            headers = dict()
+            if meta is not None and os.path.exists(self.get_path(data_url, ".json.gz")):
+                if meta.get("etag"):
+                    headers["If-None-Match"] = meta["etag"]
+                if meta.get("last_modified"):
+                    headers["If-Modified-Since"] = meta["last_modified"]
+
+            rsp = session.get(data_url, headers=headers, stream=stream)
+
+            if rsp.status_code == 304:
+                if PRINT_DEBUG:
+                    print(f"Auction list not modified (ETag: {meta.get('etag')} , Last-Modified: {meta.get('last_modified')})")
+                # The cached Body is only decompressed if the Run needs it (see read_cached), an unchanged Auction List is skipped before
+                return None, meta["sha256"], False
+
+            rsp.raise_for_status()
+
+            if stream:
+                digest = self.write_chunks(data_url, rsp.iter_content(FEED_CHUNK_SIZE))
+                body = self.read_chunks(data_url)
+            else:
+                body = rsp.content
+                digest = hashlib.sha256(body).hexdigest()
+                write_file_atomic(self.get_path(data_url, ".json.gz"), body, compress=True)
+
+            meta = {
+                "url": data_url,
+                "etag": rsp.headers.get("ETag"),
+                "last_modified": rsp.headers.get("Last-Modified"),
+                "sha256": digest,
+                "fetched_at": int(time.time()),
+            }
+
+            write_file_atomic(self.get_path(data_url, ".meta.json"), json.dumps(meta).encode("utf-8"))
+
+            return body, digest, True
+
+    def read_cached(self, data_url, stream=False):
+        # Cached Body and its Digest, read under the Lock so that both belong to the same Download
+        with open(self.get_path(data_url, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            meta = self.read_meta(data_url)
+            body = self.read_chunks(data_url) if stream else self.read_body(data_url)
+            return body, meta["sha256"]
+
+    def get_seen_path(self, data_url, consumer):
+        key = hashlib.sha1(consumer.encode("utf-8")).hexdigest()[:16]
+        return self.get_path(data_url, f".{key}.seen")
+
+    def is_seen(self, data_url, consumer, digest):
+        # Check if this exact Auction List was already processed by this Consumer (Search / Set of Searches)
+        try:
+            with open(self.get_seen_path(data_url, consumer)) as f:
+                return f.read().strip() == digest
+        except OSError:
+            return False
+
+    def mark_seen(self, data_url, consumer, digest):
+        write_file_atomic(self.get_seen_path(data_url, consumer), digest.encode("utf-8"))
+
+
+# Define Feed Snapshot Class
+# Compact Fingerprint of every Server seen in the previous Run, used to only process Servers that are new or changed
+class FeedSnapshot:
+    def __init__(self, filename, criteria):
+        self.filename = filename
+
+        # Fingerprint of the Search Criteria: if they change, every Server must be processed again
+        self.criteria = criteria
+
+        # Initialize Variables
+        self.fingerprints = dict()
+        self.added = []
+        self.changed = []
+        self.removed = set()
+
+        try:
+            with open(self.filename) as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            previous = None
+
+        # Previous Fingerprints are only valid for the same Criteria
+        if previous is not None and previous.get("criteria") == self.criteria:
+            self.previous = {int(server_id): fingerprint for server_id, fingerprint in previous.get("servers", {}).items()}
+        else:
+            self.previous = dict()
+
+    @staticmethod
+    def get_fingerprint(server_raw):
+        # Only the Fields that change during the Lifetime of an Auction
+        # next_reduce is NOT used since it counts down on every Run, next_reduce_timestamp only changes when the Price is reduced
+        fields = [server_raw.get("price"), server_raw.get("fixed_price"), server_raw.get("next_reduce_timestamp"),
+                  server_raw.get("specials"), server_raw.get("datacenter")]
+        return zlib.crc32(json.dumps(fields, separators=(",", ":")).encode("utf-8"))
+
+    def compute_delta(self, servers):
+        # Built locally and only kept once the whole Auction List was read, so that a Run that fails
+        # in the Middle of a Stream (Watch Mode) leaves nothing behind for the next Run
+        fingerprints = dict()
+        added = []
+        changed = []
+
+        for server_raw in servers:
+            server_id = server_raw.get("id", 0)
+            fingerprint = self.get_fingerprint(server_raw)
+            fingerprints[server_id] = fingerprint
+
+            previous_fingerprint = self.previous.get(server_id)
+            if previous_fingerprint is None:
+                added.append(server_raw)
+            elif previous_fingerprint != fingerprint:
+                changed.append(server_raw)
+
+        self.fingerprints = fingerprints
+        self.added = added
+        self.changed = changed
+        self.removed = set(self.previous) - set(self.fingerprints)
+
+        # Only new or changed Servers need to be processed
+        return self.added + self.changed
+
+    def get_summary(self):
+        unchanged = len(self.fingerprints) - len(self.added) - len(self.changed)
+        return f"Delta: {len(self.fingerprints)} server(s), {len(self.added)} added, {len(self.changed)} changed, {len(self.removed)} removed, {unchanged} unchanged (skipped)"
+
+    def forget(self, server_ids):
+        for server_id in server_ids:
+            self.fingerprints.pop(server_id, None)
+
+    def save(self):
+        data = {"criteria": self.criteria, "servers": self.fingerprints}
+        write_file_atomic(self.filename, json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+    def advance(self):
+        # Watch Mode: the Fingerprints of this Run are the Baseline of the next Run
+        self.previous = self.fingerprints
+        self.fingerprints = dict()
+        self.added = []
+        self.changed = []
+        self.removed = set()
+
+
+# Define Snapshot Archive Class
+# Every Auction List is stored once (content-addressed by its SHA256) in a SQLite Database, zlib compressed
+# Consecutive Auction Lists are stored as per-Server Deltas against the previous one, with a full Keyframe every KEYFRAME_INTERVAL Snapshots
+class SnapshotArchive:
+    # Maximum Length of a Delta Chain (a full Snapshot every 4 Hours at 5 Minute Intervals)
+    KEYFRAME_INTERVAL = 48
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.connection = sqlite3.connect(filename)
+
+        # Allow other Processes to read while we write
+        self.connection.execute("PRAGMA journal_mode=WAL")
+
+        # objects: one Row per distinct Auction List (full if base is NULL, otherwise a Delta against base)
+        # snapshots: which Auction List was current at which Time
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS objects (
+                                       digest TEXT PRIMARY KEY,
+                                       base TEXT,
+                                       depth INTEGER NOT NULL,
+                                       data BLOB NOT NULL
+                                   ) WITHOUT ROWID""")
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS snapshots (
+                                       timestamp INTEGER PRIMARY KEY,
+                                       digest TEXT NOT NULL
+                                   )""")
+        self.connection.commit()
+
+        # Last Auction List added or reconstructed: (Digest, Depth, Document)
+        # Saves the Reconstruction of the Base when adding the next Snapshot (Watch Mode, Imports)
+        self.latest = None
+
+    @staticmethod
+    def get_digest(document):
+        # Independent of the Formatting of the downloaded File (pretty-printed or not)
+        return hashlib.sha256(json.dumps(document, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def encode(data):
+        return zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"), 9)
+
+    @staticmethod
+    def decode(blob):
+        return json.loads(zlib.decompress(blob))
+
+    @staticmethod
+    def get_next_reduce(server_raw, countdown):
+        # next_reduce of an Auction Server counts down between two Snapshots, it is stored as a single Countdown per Delta
+        # Servers that do not follow this Rule (Price reduced, fixed Price, ...) get an explicit next_reduce in the Delta
+        next_reduce = server_raw.get("next_reduce")
+        if countdown and type(next_reduce) is int and next_reduce > 0 and not server_raw.get("fixed_price"):
+            return next_reduce - countdown
+
+        return next_reduce
+
+    @staticmethod
+    def get_countdown(previous_servers, servers):
+        # Most common Decrease of next_reduce between the two Snapshots
+        counts = dict()
+        for server_raw in servers:
+            previous_raw = previous_servers.get(server_raw.get("id", 0))
+            if previous_raw is not None and type(server_raw.get("next_reduce")) is int and type(previous_raw.get("next_reduce")) is int:
+                decrease = previous_raw["next_reduce"] - server_raw["next_reduce"]
+                if decrease > 0:
+                    counts[decrease] = counts.get(decrease, 0) + 1
+
+        return max(counts, key=counts.get) if len(counts) > 0 else 0
+
+    @staticmethod
+    def get_delta(previous, document):
+        # Per-Server Delta: added Servers in full, only the changed Fields of changed Servers, IDs of removed Servers
+        previous_servers = {server_raw.get("id", 0): server_raw for server_raw in previous["server"]}
+        current_ids = set()
+
+        countdown = SnapshotArchive.get_countdown(previous_servers, document["server"])
+
+        # Initialize Variables
+        added = []
+        changed = dict()
+        dropped = dict()
+
+        for server_raw in document["server"]:
+            server_id = server_raw.get("id", 0)
+            current_ids.add(server_id)
+
+            previous_raw = previous_servers.get(server_id)
+            if previous_raw is None:
+                added.append(server_raw)
+                continue
+
+            next_reduce = SnapshotArchive.get_next_reduce(previous_raw, countdown)
+            if previous_raw == server_raw and next_reduce == previous_raw.get("next_reduce"):
+                continue
+
+            fields = {key: value for key, value in server_raw.items() if key not in previous_raw or previous_raw[key] != value}
+            if "next_reduce" in server_raw:
+                if server_raw["next_reduce"] == next_reduce:
+                    fields.pop("next_reduce", None)
+                else:
+                    fields["next_reduce"] = server_raw["next_reduce"]
+
+            missing = [key for key in previous_raw if key not in server_raw]
+            if len(fields) > 0 or len(missing) > 0:
+                changed[server_id] = fields
+            if len(missing) > 0:
+                dropped[server_id] = missing
+
+        delta = {"meta": {key: value for key, value in document.items() if key != "server"},
+                 "countdown": countdown,
+                 "added": added,
+                 "changed": changed,
+                 "dropped": dropped,
+                 "removed": [server_id for server_id in previous_servers if server_id not in current_ids]}
+
+        # The Order of the Servers is only stored if applying the Delta would not restore it
+        order = [server_raw.get("id", 0) for server_raw in document["server"]]
+        expected = [server_id for server_id in previous_servers if server_id in current_ids] + [server_raw.get("id", 0) for server_raw in added]
+        if order != expected:
+            delta["order"] = order
+
+        return delta
+
+    @staticmethod
+    def apply_delta(servers, delta):
+        # Apply a Delta to a Dictionary of Servers (by ID), returns the other Keys of the Document
+        # Changed Servers are replaced by Copies, so that Documents returned earlier are never modified
+        for server_id in delta["removed"]:
+            del servers[server_id]
+
+        # Count down next_reduce of the remaining Servers first, explicit Values in changed override it
+        # Same Rule as get_next_reduce(), inlined since this Loop runs over every Server for every Delta
+        countdown = delta["countdown"]
+        if countdown:
+            for server_id, server_raw in servers.items():
+                next_reduce = server_raw.get("next_reduce")
+                if type(next_reduce) is int and next_reduce > 0 and not server_raw.get("fixed_price"):
+                    servers[server_id] = {**server_raw, "next_reduce": next_reduce - countdown}
+
+        for server_id, fields in delta["changed"].items():
+            server_raw = {**servers[int(server_id)], **fields}
+            for key in delta["dropped"].get(server_id, []):
+                del server_raw[key]
+            servers[int(server_id)] = server_raw
+
+        for server_raw in delta["added"]:
+            servers[server_raw.get("id", 0)] = server_raw
+
+        if "order" in delta:
+            ordered = {server_id: servers[server_id] for server_id in delta["order"]}
+            servers.clear()
+            servers.update(ordered)
+
+        return delta["meta"]
+
+    @staticmethod
+    def get_servers(document):
+        return {server_raw.get("id", 0): server_raw for server_raw in document["server"]}
+
+    def get_object(self, digest):
+        return self.connection.execute("SELECT base, depth, data FROM objects WHERE digest = ?", [digest]).fetchone()
+
+    def load(self, digest):
+        # Reconstruct an Auction List: walk back to the Keyframe (or the cached latest Document), then apply the Deltas forward
+        chain = []
+        document = None
+        while True:
+            if self.latest is not None and self.latest[0] == digest:
+                document = self.latest[2]
+                break
+
+            base, depth, data = self.get_object(digest)
+            chain.append(data)
+            if base is None:
+                break
+            digest = base
+
+        if document is None:
+            document = self.decode(chain.pop())
+
+        if len(chain) == 0:
+            return document
+
+        # All Deltas are applied to the same Dictionary, the Document is only built at the End
+        servers = self.get_servers(document)
+        for data in reversed(chain):
+            meta = self.apply_delta(servers, self.decode(data))
+
+        return {**meta, "server": list(servers.values())}
+
+    def add(self, timestamp, document):
+        # Returns True if the Auction List was not stored yet
+        digest = self.get_digest(document)
+
+        # Nothing to store if the Auction List did not change since the previous Snapshot
+        row = self.connection.execute("SELECT digest FROM snapshots WHERE timestamp <= ? ORDER BY timestamp DESC LIMIT 1", [int(timestamp)]).fetchone()
+        if row is not None and row[0] == digest:
+            return False
+
+        self.connection.execute("INSERT OR REPLACE INTO snapshots (timestamp, digest) VALUES (?, ?)", [int(timestamp), digest])
+
+        row = self.connection.execute("SELECT depth FROM objects WHERE digest = ?", [digest]).fetchone()
+        if row is not None:
+            # Same Content as an older Snapshot
+            self.connection.commit()
+            self.latest = (digest, row[0], document)
+            return False
+
+        # Base the Delta on the most recently added Auction List
+        if self.latest is None:
+            row = self.connection.execute("SELECT snapshots.digest, depth FROM snapshots JOIN objects ON objects.digest = snapshots.digest WHERE snapshots.digest != ? ORDER BY timestamp DESC LIMIT 1", [digest]).fetchone()
+            if row is not None:
+                self.latest = (row[0], row[1], self.load(row[0]))
+
+        if self.latest is None or self.latest[1] + 1 >= self.KEYFRAME_INTERVAL:
+            base, depth, data = None, 0, self.encode(document)
+        else:
+            base, depth, data = self.latest[0], self.latest[1] + 1, self.encode(self.get_delta(self.latest[2], document))
+
+        self.connection.execute("INSERT INTO objects (digest, base, depth, data) VALUES (?, ?, ?, ?)", [digest, base, depth, data])
+        self.connection.commit()
+
+        self.latest = (digest, depth, document)
+        return True
+
+    def get(self, timestamp):
+        # Auction List that was current at the given Time (None if the Archive starts later)
+        row = self.connection.execute("SELECT digest FROM snapshots WHERE timestamp <= ? ORDER BY timestamp DESC LIMIT 1", [int(timestamp)]).fetchone()
+        if row is None:
+            return None
+
+        return self.load(row[0])
+
+    def get_timestamps(self, start=None, end=None):
+        rows = self.connection.execute("SELECT timestamp FROM snapshots WHERE timestamp >= ? AND timestamp <= ? ORDER BY timestamp",
+                                       [int(start) if start is not None else 0, int(end) if end is not None else 2**62])
+        return [row[0] for row in rows]
+
+    def iter_snapshots(self, start=None, end=None):
+        # Yield (Timestamp, Document) in chronological Order
+        # Consecutive Deltas are applied one after the other instead of reconstructing every Snapshot from its Keyframe
+        rows = self.connection.execute("SELECT timestamp, digest FROM snapshots WHERE timestamp >= ? AND timestamp <= ? ORDER BY timestamp",
+                                       [int(start) if start is not None else 0, int(end) if end is not None else 2**62]).fetchall()
+        for timestamp, digest in rows:
+            if self.latest is None or self.latest[0] != digest:
+                base, depth, data = self.get_object(digest)
+                if base is not None and self.latest is not None and self.latest[0] == base:
+                    servers = self.get_servers(self.latest[2])
+                    meta = self.apply_delta(servers, self.decode(data))
+                    document = {**meta, "server": list(servers.values())}
+                else:
+                    document = self.load(digest)
+                self.latest = (digest, depth, document)
+
+            yield timestamp, self.latest[2]
+
+    def get_summary(self):
+        snapshots = self.connection.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0]
+        objects, keyframes, size = self.connection.execute("SELECT COUNT(*), COUNT(*) - COUNT(base), COALESCE(SUM(LENGTH(data)), 0) FROM objects").fetchone()
+        return f"Archive: {snapshots} snapshot(s), {objects} distinct ({keyframes} full, {objects - keyframes} delta), {size} bytes compressed"
+
+    def close(self):
+        self.connection.close()
+
+
+# Define Price History Class
+# Price Points of every Server over Time in a SQLite Database, indexed so that Queries never scan the Snapshots again
+# Only Changes are stored: a Price Point when a Server is first seen and whenever its Price changes
+class PriceHistory:
+    def __init__(self, filename):
+        self.filename = filename
+        self.connection = sqlite3.connect(filename)
+
+        # Allow other Processes to read while we write
+        self.connection.execute("PRAGMA journal_mode=WAL")
+
+        # servers: one Row per Server with its current and lowest Price
+        # prices: Price Points by (Server ID, Timestamp), with the previous Price so that Drops are found without a Self-Join
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS servers (
+                                       server_id INTEGER PRIMARY KEY,
+                                       cpu TEXT,
+                                       datacenter TEXT,
+                                       ram_size INTEGER,
+                                       first_seen INTEGER NOT NULL,
+                                       last_seen INTEGER NOT NULL,
+                                       price REAL,
+                                       min_price REAL
+                                   )""")
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS prices (
+                                       server_id INTEGER NOT NULL,
+                                       timestamp INTEGER NOT NULL,
+                                       price REAL,
+                                       previous_price REAL,
+                                       next_reduce_timestamp INTEGER,
+                                       PRIMARY KEY (server_id, timestamp)
+                                   ) WITHOUT ROWID""")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS prices_timestamp ON prices (timestamp)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS servers_cpu ON servers (cpu)")
+        self.connection.commit()
+
+        # Current Price of every known Server (loaded on the first Ingest)
+        self.prices = None
+
+    def ingest(self, timestamp, servers):
+        # Returns the Number of Price Points added
+        timestamp = int(timestamp)
+
+        if self.prices is None:
+            self.prices = dict(self.connection.execute("SELECT server_id, price FROM servers"))
+
+        # Initialize Variables
+        new_servers = []
+        points = []
+        seen = []
+
+        for server_raw in servers:
+            server_id = server_raw.get("id", 0)
+            price = server_raw.get("price", 0.0)
+            seen.append((timestamp, server_id))
+
+            if server_id not in self.prices:
+                new_servers.append((server_id, server_raw.get("cpu", "UNKNOWN_CPU"), server_raw.get("datacenter", "UNKNOWN_DATACENTER"),
+                                    server_raw.get("ram_size", 0), timestamp, timestamp, price, price))
+                points.append((server_id, timestamp, price, None, server_raw.get("next_reduce_timestamp")))
+            elif self.prices[server_id] != price:
+                points.append((server_id, timestamp, price, self.prices[server_id], server_raw.get("next_reduce_timestamp")))
+            else:
+                continue
+
+            self.prices[server_id] = price
+
+        self.connection.executemany("INSERT OR REPLACE INTO servers VALUES (?, ?, ?, ?, ?, ?, ?, ?)", new_servers)
+        self.connection.executemany("INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?, ?)", points)
+        self.connection.executemany("UPDATE servers SET last_seen = MAX(last_seen, ?) WHERE server_id = ?", seen)
+        self.connection.executemany("UPDATE servers SET price = ?, min_price = MIN(min_price, ?) WHERE server_id = ?",
+                                    [(price, price, server_id) for server_id, point_timestamp, price, previous_price, next_reduce_timestamp in points if previous_price is not None])
+        self.connection.commit()
+
+        return len(points)
+
+    def get_latest_timestamp(self):
+        return self.connection.execute("SELECT MAX(last_seen) FROM servers").fetchone()[0]
+
+    def get_trajectory(self, server_id):
+        # (Timestamp, Price, next_reduce_timestamp) of every Price Change of the Server
+        return self.connection.execute("SELECT timestamp, price, next_reduce_timestamp FROM prices WHERE server_id = ? ORDER BY timestamp",
+                                       [server_id]).fetchall()
+
+    def get_drops(self, since):
+        # Servers whose Price dropped since the given Time: (Server ID, CPU, Datacenter, Timestamp, previous Price, Price)
+        return self.connection.execute("""SELECT prices.server_id, cpu, datacenter, timestamp, previous_price, prices.price
+                                          FROM prices JOIN servers ON servers.server_id = prices.server_id
+                                          WHERE timestamp >= ? AND prices.price < previous_price
+                                          ORDER BY timestamp, prices.server_id""", [int(since)]).fetchall()
+
+    def get_lowest(self, cpu):
+        # Lowest observed Price for every CPU Model that contains the given Text: (CPU, Price, Server ID, Servers seen)
+        return self.connection.execute("""SELECT cpu, MIN(min_price), server_id, COUNT(*) FROM servers
+                                          WHERE cpu LIKE ? GROUP BY cpu ORDER BY MIN(min_price)""", [f"%{cpu}%"]).fetchall()
+
+    def get_summary(self):
+        servers = self.connection.execute("SELECT COUNT(*) FROM servers").fetchone()[0]
+        points = self.connection.execute("SELECT COUNT(*) FROM prices").fetchone()[0]
+        return f"History: {servers} server(s), {points} price point(s)"
+
+    def close(self):
+        self.connection.close()
+
+
+# Define CPU Matcher Class
+# All CPU Patterns of --match-cpu (and of --exclude-cpu) compiled into a single Regular Expression
+# The Auction List only has a few distinct CPU Descriptions, so the Result is cached per Description and every
+# further Server with the same CPU costs a single Dictionary Lookup
+class CpuMatcher:
+    def __init__(self, match_patterns=None, exclude_patterns=None, word=False, regex=False):
+        self.match = self.compile(match_patterns, word, regex)
+        self.exclude = self.compile(exclude_patterns, word, regex)
+
+        # (Matched, Excluded) and overall Result per CPU Description
+        self.results = dict()
+        self.accepted = dict()
+
+    @staticmethod
+    def compile(patterns, word=False, regex=False):
+        if patterns is None:
+            return None
+
+        # Comma-separated Substrings by default, one Regular Expression with --cpu-regex (a Comma is Part of the Expression, e.g. \d{3,4})
+        if regex:
+            expression = patterns
+        else:
+            expression = "|".join(f"(?:{re.escape(pattern)})" for pattern in patterns.split(","))
+
+        # Only whole Words (e.g. 1275 does not match 1275V6)
+        if word:
+            expression = rf"\b(?:{expression})\b"
+
+        try:
+            return re.compile(expression, re.IGNORECASE)
+        except re.error as e:
+            print(f"Invalid CPU pattern {patterns}: {e}")
+            exit(1)
+
+    @staticmethod
+    def normalize(description):
+        # Same Normalization as the Patterns (case-insensitive)
+        return description.lower()
+
+    def get_result(self, description):
+        result = self.results.get(description)
+        if result is None:
+            normalized = self.normalize(description)
+            matched = self.match is None or self.match.search(normalized) is not None
+            excluded = self.exclude is not None and self.exclude.search(normalized) is not None
+            result = (matched, excluded)
+            self.results[description] = result
+        return result
+
+    def matches(self, description):
+        accepted = self.accepted.get(description)
+        if accepted is None:
+            # Exclusion has Priority over Match
+            matched, excluded = self.get_result(description)
+            accepted = matched and not excluded
+            self.accepted[description] = accepted
+        return accepted
+
+
+# CPU Matchers by Patterns and Options (shared by all Searches with the same CPU Criteria)
+CPU_MATCHERS = dict()
+
+
+def get_cpu_matcher(cli_args):
+    # None if the Search does not filter by CPU
+    if not cli_args.match_cpu_description and not cli_args.exclude_cpu_description:
+        return None
+
+    match_patterns = cli_args.match_cpu_description[0] if cli_args.match_cpu_description else None
+    exclude_patterns = cli_args.exclude_cpu_description[0] if cli_args.exclude_cpu_description else None
+    key = (match_patterns, exclude_patterns, cli_args.cpu_word, cli_args.cpu_regex)
+    if key not in CPU_MATCHERS:
+        CPU_MATCHERS[key] = CpuMatcher(match_patterns, exclude_patterns, word=cli_args.cpu_word, regex=cli_args.cpu_regex)
+    return CPU_MATCHERS[key]
+
+
+# Define Criteria Plan Class
+# Search Criteria compiled once per Search into a short List of Checks, ordered cheap-first and stopping at the first Failure
+class CriteriaPlan:
+    # Options that require a minimum Value, in the Order in which they are checked
+    MINIMUM_OPTIONS = ["ram_size", "cpu_count",
+                       "disk_general_count", "disk_general_total_size", "disk_general_each_size",
+                       "disk_quick_count", "disk_quick_total_size", "disk_quick_each_size",
+                       "disk_hdd_count", "disk_hdd_total_size", "disk_hdd_each_size",
+                       "disk_ssd_count", "disk_ssd_total_size", "disk_ssd_each_size",
+                       "disk_nvme_count", "disk_nvme_total_size", "disk_nvme_each_size"]
+
+    # Options that require a Property to be present
+    FLAG_OPTIONS = ["disk_quick", "disk_hdd", "disk_ssd", "disk_nvme",
+                    "sp_hw_raid", "sp_red_psu", "sp_ecc", "sp_gpu", "sp_ipv4", "sp_inic"]
+
+    def __init__(self, cli_args):
+        self.cli_args = cli_args
+
+        # Maximum Price
+        self.max_price = cli_args.price[0] if cli_args.price else None
+
+        # Server IDs (converted to Integer only once)
+        self.ids = frozenset(int(server_id) for server_id in cli_args.id[0].split(",")) if cli_args.id is not None else None
+
+        # Datacenter or Location
+        self.datacenter = cli_args.datacenter[0] if cli_args.datacenter is not None else None
+
+        # Minimum Values
+        # Counts can never be negative, so a Minimum of 0 is always satisfied and can be left out
+        self.minimums = []
+        for name in self.MINIMUM_OPTIONS:
+            value = getattr(cli_args, name)
+            if value and not (name.endswith("_count") and value[0] <= 0):
+                self.minimums.append((name, value[0]))
+
+        # Required Properties
+        self.flags = [name for name in self.FLAG_OPTIONS if getattr(cli_args, name)]
+
+        # CPU Descriptions (Patterns compiled only once)
+        self.cpu = get_cpu_matcher(cli_args)
+
+        # Highest Price of a Near Miss (only set with --wake-on-reduce, see track_near_misses)
+        self.near_price = None
+
+        # Properties that are actually checked (Criteria left at their Default are not)
+        criteria = [name for name, minimum in self.minimums] + self.flags
+        if self.max_price is not None:
+            criteria.append("price")
+        if self.ids is not None:
+            criteria.append("id")
+        if self.datacenter is not None:
+            criteria.append("datacenter")
+        if self.cpu is not None:
+            criteria.append("cpu_description")
+        self.criteria = frozenset(criteria)
+
+    def track_near_misses(self, margin):
+        # Servers that satisfy every other Criterion and cost at most margin Percent more than the maximum Price
+        # are collected by the Matching Pass (Searches without a maximum Price cannot be missed by the Price)
+        if self.max_price is not None:
+            self.near_price = self.max_price * (1 + margin / 100)
+
+    def matches(self, analysis, check_price=True):
+        # Match Price
+        if check_price and self.max_price is not None and analysis.price > self.max_price:
+            return False
+
+        # Match ID
+        if self.ids is not None and analysis.id not in self.ids:
+            return False
+
+        # Match Minimum Values (RAM, CPU Count, Disks)
+        for name, minimum in self.minimums:
+            if getattr(analysis, name) < minimum:
+                return False
+
+        # Match Required Properties (Disk Types, Specials)
+        for name in self.flags:
+            if not getattr(analysis, name):
+                return False
+
+        # Match Datacenter
+        if self.datacenter is not None and self.datacenter not in analysis.datacenter:
+            return False
+
+        # Match / Exclude Specific CPUs
+        if self.cpu is not None and not self.cpu.matches(analysis.cpu_description):
+            return False
+
+        return True
+
+    def explain(self, analysis):
+        # Slow Path: fill matchresult / excluderesult of the Analysis for every Property (Debugging and Verbose Output)
+        return apply_criteria(analysis, self.cli_args)
+
+    def is_near_miss(self, analysis):
+        # Server that only misses the Search by its Price and gets cheaper later (Servers with a fixed Price are never reduced)
+        return (self.near_price is not None and self.max_price < analysis.price <= self.near_price
+                and not analysis.server_raw.get("fixed_price") and type(analysis.server_raw.get("next_reduce_timestamp")) is int
+                and self.matches(analysis, check_price=False))
+
+
+# Define Feed Columns Class
+# Whole Auction List as Column Arrays (NumPy), so that every numeric / flag Criterion is evaluated for all Servers at once
+class FeedColumns:
+    # Binary File (--feed-binary-write): Magic, Length of the Header, Header (JSON: String Tables and Layout of the Columns),
+    # then every Column and the Server Records (compact JSON, only decoded for Matches), each aligned to 8 Bytes
+    # so that the Columns can be used directly from the memory-mapped File
+    BINARY_MAGIC = b"HAHFEED1"
+    BINARY_VERSION = 1
+
+    def __init__(self, servers, np):
+        self.np = np
+        self.servers = servers
+
+        # Digest of the Auction List this was built from (only known for binary Auction Lists)
+        self.source = None
+
+        # Initialize Variables
+        ids = []
+        prices = []
+        ram_sizes = []
+        cpu_counts = []
+        specials = []
+        datacenters = []
+        disks = {name: [] for name in Server.SERVER_DISK_FIELDS}
+
+        # Bit of each Special, by the Name used in the Auction List
+        special_bits = {code: bit for code, bit in SERVER_SPECIALS.values()}
+
+        # Datacenter Codes (String Table)
+        self.datacenter_names = []
+        datacenter_codes = dict()
+
+        # CPU Codes (String Table)
+        self.cpu_names = []
+        cpu_codes = dict()
+        cpus = []
+
+        # Single Pass over the Auction List
+        for server_raw in servers:
+            ids.append(server_raw.get("id", 0))
+            prices.append(server_raw.get("price", 0.0))
+            ram_sizes.append(server_raw.get("ram_size", 0))
+            cpu_counts.append(server_raw.get("cpu_count", 0))
+
+            bits = 0
+            for special in server_raw.get("specials", []):
+                bits |= special_bits.get(special, 0)
+            specials.append(bits)
+
+            datacenter = server_raw.get("datacenter", "UNKNOWN_DATACENTER")
+            if datacenter not in datacenter_codes:
+                datacenter_codes[datacenter] = len(self.datacenter_names)
+                self.datacenter_names.append(datacenter)
+            datacenters.append(datacenter_codes[datacenter])
+
+            cpu = server_raw.get("cpu", "UNKNOWN_CPU")
+            if cpu not in cpu_codes:
+                cpu_codes[cpu] = len(self.cpu_names)
+                self.cpu_names.append(cpu)
+            cpus.append(cpu_codes[cpu])
+
+            # Same Disk Properties as the Server Class (computed by the same Code)
+            server = Server(server_raw)
+            server.compute_disk_stats()
+            for name in Server.SERVER_DISK_FIELDS:
+                disks[name].append(getattr(server, name))
+
+        self.columns = {
+            "id": np.array(ids, dtype=np.int64),
+            "price_net": np.array(prices, dtype=np.float64),
+            "ram_size": np.array(ram_sizes, dtype=np.int64),
+            "cpu_count": np.array(cpu_counts, dtype=np.int64),
+            "specials": np.array(specials, dtype=np.uint8),
+            "datacenter": np.array(datacenters, dtype=np.int32),
+            "cpu": np.array(cpus, dtype=np.int32),
+        }
+
+        for name, values in disks.items():
+            self.columns[name] = np.array(values, dtype=bool if name in CriteriaPlan.FLAG_OPTIONS else np.int64)
+
+        # Gross Price for each Tax Rate (computed on first Use)
+        self.prices = dict()
+
+    def save(self, filename, source=None):
+        np = self.np
+
+        # Server Records and their Offsets
+        records = [json.dumps(server_raw, separators=(",", ":")).encode("utf-8") for server_raw in self.servers]
+        record_offsets = np.zeros(len(records) + 1, dtype=np.uint64)
+        record_offsets[1:] = np.cumsum([len(record) for record in records], dtype=np.uint64)
+
+        header = {"version": self.BINARY_VERSION, "count": len(self), "source": source, "created": int(time.time()),
+                  "datacenters": self.datacenter_names, "cpus": self.cpu_names, "columns": []}
+
+        # Columns (Offsets relative to the End of the Header)
+        chunks = []
+        position = 0
+        for name, values in [*self.columns.items(), ("record_offset", record_offsets)]:
+            data = values.tobytes()
+            header["columns"].append({"name": name, "dtype": values.dtype.str, "offset": position, "length": len(values)})
+            chunks.append(data + b"\0" * (-len(data) % 8))
+            position += len(chunks[-1])
+
+        header["records"] = position
+        chunks.append(b"".join(records))
+
+        # Pad the Header so that the Columns start on an 8 Byte Boundary
+        header_data = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        header_data += b" " * (-(len(self.BINARY_MAGIC) + 4 + len(header_data)) % 8)
+
+        write_file_atomic(filename, self.BINARY_MAGIC + len(header_data).to_bytes(4, "little") + header_data + b"".join(chunks))
+
+    @classmethod
+    def load(cls, filename, np):
+        # The Columns are Views of the memory-mapped File: nothing is parsed or copied, and the Page Cache is shared
+        # by all Processes reading the same File
+        with open(filename, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if buffer[:len(cls.BINARY_MAGIC)] != cls.BINARY_MAGIC:
+            raise ValueError(f"{filename} is not a binary auction list")
+
+        start = len(cls.BINARY_MAGIC) + 4
+        header_length = int.from_bytes(buffer[len(cls.BINARY_MAGIC):start], "little")
+        header = json.loads(buffer[start:start + header_length])
+        if header["version"] != cls.BINARY_VERSION:
+            raise ValueError(f"Unsupported version {header['version']} of binary auction list {filename}")
+        start += header_length
+
+        columns = cls.__new__(cls)
+        columns.np = np
+        columns.buffer = buffer
+        columns.source = header["source"]
+        columns.datacenter_names = header["datacenters"]
+        columns.cpu_names = header["cpus"]
+        columns.columns = {column["name"]: np.frombuffer(buffer, dtype=column["dtype"], count=column["length"], offset=start + column["offset"])
+                           for column in header["columns"]}
+        columns.servers = FeedRecords(buffer, start + header["records"], columns.columns.pop("record_offset"))
+        columns.prices = dict()
+        return columns
+
+    def __len__(self):
+        return len(self.servers)
+
+    def get_price(self, tax_percent):
+        # Same Formula (and Order of Operations) as the Server Class, so that both give the same Result
+        if tax_percent not in self.prices:
+            self.prices[tax_percent] = self.columns["price_net"]*(100+tax_percent)/100
+        return self.prices[tax_percent]
+
+    def get_column(self, name):
+        if name in SERVER_SPECIALS:
+            return (self.columns["specials"] & SERVER_SPECIALS[name][1]) != 0
+        return self.columns[name]
+
+    def get_mask(self, plan, tax_percent):
+        np = self.np
+
+        # By default all Servers Satisfy the Criteria
+        mask = np.ones(len(self), dtype=bool)
+
+        # Match Price (Near Misses are told apart from Matches by CriteriaPlan.matches)
+        if plan.near_price is not None:
+            mask &= self.get_price(tax_percent) <= plan.near_price
+        elif plan.max_price is not None:
+            mask &= self.get_price(tax_percent) <= plan.max_price
+
+        # Match ID
+        if plan.ids is not None:
+            mask &= np.isin(self.columns["id"], np.array(sorted(plan.ids), dtype=np.int64))
+
+        # Match Minimum Values (RAM, CPU Count, Disks)
+        for name, minimum in plan.minimums:
+            mask &= self.get_column(name) >= minimum
+
+        # Match Required Properties (Disk Types, Specials)
+        for name in plan.flags:
+            mask &= self.get_column(name)
+
+        # Match Datacenter (Substring Search only once per distinct Datacenter)
+        if plan.datacenter is not None:
+            codes = [code for code, datacenter in enumerate(self.datacenter_names) if plan.datacenter in datacenter]
+            mask &= np.isin(self.columns["datacenter"], np.array(codes, dtype=np.int32))
+
+        # Match / Exclude Specific CPUs (once per distinct CPU)
+        if plan.cpu is not None:
+            codes = [code for code, cpu in enumerate(self.cpu_names) if plan.cpu.matches(cpu)]
+            mask &= np.isin(self.columns["cpu"], np.array(codes, dtype=np.int32))
+
+        return mask
+
+
+# Define Feed Records Class
+# Server Records of a binary Auction List, decoded one at a time when they are accessed
+class FeedRecords:
+    def __init__(self, buffer, start, offsets):
+        self.buffer = buffer
+        self.start = start
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        # IndexError also ends Iterations
+        if index < 0 or index >= len(self):
+            raise IndexError(index)
+
+        begin = self.start + int(self.offsets[index])
+        end = self.start + int(self.offsets[index + 1])
+        return json.loads(self.buffer[begin:end])
+
+
+def get_numpy():
+    # NumPy is an optional Dependency, only needed for --engine numpy
+    try:
+        import numpy
+    except ImportError:
+        print("--engine numpy requires NumPy (pip install numpy)")
+        exit(1)
+
+    return numpy
+
+
+# Define Feed Stream Class
+# Incremental Parser for the Auction List: only the "server" Array is decoded, one Server at a time,
+# so that the Memory used is bounded by a single Server plus the Read Buffer
+class FeedStream:
+    WHITESPACE = " \t\r\n"
+    NUMBER_CHARACTERS = "0123456789.eE+-"
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = json.JSONDecoder()
+        self.utf8 = codecs.getincrementaldecoder("utf-8")()
+
+        # Initialize Variables
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def read_more(self):
+        # Drop what was already consumed and append the next Chunk
+        self.buffer = self.buffer[self.position:]
+        self.position = 0
+
+        for chunk in self.chunks:
+            if chunk:
+                self.buffer += self.utf8.decode(chunk)
+                return True
+
+        self.buffer += self.utf8.decode(b"", final=True)
+        self.eof = True
+        return False
+
+    def peek(self):
+        # Next non-Whitespace Character (None at the End of the Stream)
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in self.WHITESPACE:
+                self.position += 1
+
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+
+            if not self.read_more():
+                return None
+
+    def expect(self, characters):
+        character = self.peek()
+        if character is None or character not in characters:
+            raise ValueError(f"Unexpected {character!r} at Position {self.position} (expected one of {characters!r})")
+
+        self.position += 1
+        return character
+
+    def read_value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+
+                # A Number may continue in the next Chunk (e.g. "1" of "1.5"), so it is only complete if followed by something else
+                if self.eof or (end < len(self.buffer) and not (isinstance(value, (int, float)) and self.buffer[end] in self.NUMBER_CHARACTERS)):
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                # Incomplete Value: read more, unless there is nothing left
+                if self.eof:
+                    raise
+
+            self.read_more()
+
+    def iter_servers(self):
+        self.expect("{")
+        if self.peek() == "}":
+            return
+
+        while True:
+            key = self.read_value()
+            self.expect(":")
+
+            if key == "server":
+                self.expect("[")
+                if self.peek() == "]":
+                    self.position += 1
+                else:
+                    while True:
+                        yield self.read_value()
+                        if self.expect(",]") == "]":
+                            break
+            else:
+                # Other Keys are decoded and thrown away
+                self.read_value()
+
+            if self.expect(",}") == "}":
+                return
+
+
+# Define Search Class
+# A Search bundles the Criteria (parsed Command Line Arguments), the Notification Providers and the State used for Deduplication
+class Search:
+    def __init__(self, label, cli_args, state_file, test_mode=False):
+        self.label = label
+        self.cli_args = cli_args
+        self.state_file = state_file
+
+        # Every Match is sent to all Providers (comma-separated), each Provider only once
+        providers = [provider.strip() for provider in cli_args.provider[0].split(",")]
+        if "" in providers:
+            print(f"Search {label}: invalid provider list \"{cli_args.provider[0]}\" (empty provider name)")
+            exit(1)
+        self.providers = list(dict.fromkeys(providers))
+
+        # Search is in Test Mode if either the Search itself or the whole Run is in Test Mode
+        self.test_mode = cli_args.test_mode or test_mode
+
+        # Tax Percent to apply to the Price of each Server
+        self.tax_percent = cli_args.tax_percent[0] if not cli_args.exclude_tax else 0.0
+
+        # Only keep the best Matches by Value (Price per Unit)
+        self.rank = cli_args.rank[0] if cli_args.rank else None
+        self.top = cli_args.top[0]
+
+        # Compile the Criteria only once
+        self.plan = CriteriaPlan(cli_args)
+
+        # Array to Store Found Matches
+        self.foundServers = []
+
+        # Next Price Reduction of the Near Misses of the last Run: {Server ID: Timestamp} (only with --wake-on-reduce)
+        self.nearMisses = dict()
+
+        # Notifications queued in the Dispatcher: (Provider, List of Analysis, Future)
+        self.pendingNotifications = []
+
+        # IDs of the matching Servers already sent through each Provider (filled by remove_processed)
+        self.processed = dict()
+
+        # These are only set when the Search is opened
+        self.notifiers = dict()
+        self.states = dict()
+        self.opened = False
+
+    def get_notifier(self, provider):
+        # The Notifiers Library is only loaded once there is something to send (importing it takes longer than a whole Run)
+        if provider == "dummy":
+            return None
+
+        if provider not in self.notifiers:
+            import notifiers
+            self.notifiers[provider] = notifiers.get_notifier(provider)
+
+        return self.notifiers[provider]
+
+    def open(self, store=None):
+        # In Watch Mode the Search stays open (State and Notifier are reused) across Runs
+        if self.opened:
+            return
+        self.opened = True
+
+        # Nothing to do in Test Mode (state file is ignored and no messages are sent)
+        if self.test_mode:
+            return
+
+        # Use the SQLite State Store if available, otherwise the legacy State File
+        # Each Provider has its own State, so that a failed Provider is retried without sending again through the others
+        # The first Provider keeps the State of the Search (adding a Provider does not notify the others again)
+        for index, provider in enumerate(self.providers):
+            if store is not None:
+                self.states[provider] = SearchState(store, self.label if index == 0 else f"{self.label}@{provider}")
+            else:
+                self.states[provider] = TextStateFile(self.state_file if index == 0 else f"{self.state_file}.{provider}")
+
+    def close(self):
+        for state in self.states.values():
+            state.close()
+        self.states = dict()
+        self.opened = False
+
+    def remove_processed(self):
+        # Nothing to remove in Test Mode (state file is ignored)
+        self.processed = dict()
+        if self.test_mode or len(self.foundServers) == 0:
+            return
+
+        # Check all Candidates at once (one batched Lookup per Provider)
+        server_ids = [analysis.id for analysis in self.foundServers]
+        for provider, state in self.states.items():
+            self.processed[provider] = state.get_processed(server_ids)
+
+        # Keep the Servers that still have to be sent through at least one Provider
+        self.foundServers = [analysis for analysis in self.foundServers
+                             if any(analysis.id not in processed for processed in self.processed.values())]
+
+    def get_unsent(self, provider, analyses):
+        # Servers not yet sent through this Provider
+        processed = self.processed.get(provider, ())
+        return [analysis for analysis in analyses if analysis.id not in processed]
+
+
+def get_parser():
     parser = argparse.ArgumentParser(
         description='hah.py -- checks for newest servers on Hetzner server auction (server-bidding) and pushes to one of dozen providers supported by Notifiers library')
 
@@ -514,7 +2314,7 @@ if __name__ == "__main__":
 
     parser.add_argument('--provider', dest='provider' , nargs=1, required=False, type=str,
                         default=["dummy"],
-                        help='Notifiers provider name - see https://notifiers.readthedocs.io/en/latest/providers/index.html')
+                        help='Notifiers provider name, or a comma-separated list of them to notify through all of them - see https://notifiers.readthedocs.io/en/latest/providers/index.html')
 
     parser.add_argument('--tax', dest='tax_percent' , nargs=1, required=False, type=int,
                         default=[19],
@@ -629,6 +2429,12 @@ if __name__ == "__main__":
     parser.add_argument('--exclude-cpu', dest='exclude_cpu_description' , nargs=1, required=False, type=str,
                         help='exclude specific server by CPU description (has priority over --match-cpu)')
 
+    parser.add_argument('--cpu-word', dest='cpu_word' , action='store_true',
+                        help='--match-cpu and --exclude-cpu only match whole words (1275 does not match 1275V6)')
+
+    parser.add_argument('--cpu-regex', dest='cpu_regex' , action='store_true',
+                        help='--match-cpu and --exclude-cpu are each one regular expression (case-insensitive, not split on commas - use | for alternatives)')
+
     parser.add_argument('--ram', dest='ram_size' , nargs=1, required=False, type=int,
                         help='min RAM (GB)')
 
@@ -657,7 +2463,166 @@ if __name__ == "__main__":
     parser.add_argument('--send-payload', dest='send_payload' , action='store_true',
                         help='send server data as JSON payload')
 
-    cli_args = parser.parse_args()
+
+    parser.add_argument('--state-db', dest='state_db' , nargs=1, required=False, type=str,
+                        help='SQLite state database (replaces the state file given by -f)')
+
+    parser.add_argument('--import-state', dest='import_state' , nargs=1, required=False, type=str,
+                        help='import a legacy state file (e.g. /tmp/hah.txt) into --state-db and exit')
+
+    parser.add_argument('--import-label', dest='import_label' , nargs=1, required=False, type=str,
+                        default=["default"],
+                        help='search label to use with --import-state (defaults to the label of a command line search)')
+
+    parser.add_argument('--cache-dir', dest='cache_dir' , nargs=1, required=False, type=str,
+                        help='cache directory for the auction list (conditional download, skip run if unchanged)')
+
+    parser.add_argument('--diff-state', dest='diff_state' , nargs=1, required=False, type=str,
+                        help='snapshot file of the previous run - only process servers that are new or changed since then')
+
+    parser.add_argument('--engine', dest='engine' , nargs=1, required=False, type=str,
+                        default=["python"], choices=["python", "numpy"],
+                        help='matching engine: python (server by server) or numpy (vectorized over the whole auction list, requires NumPy)')
+
+    parser.add_argument('--stream', dest='stream' , action='store_true',
+                        help='parse the auction list while it is being read, one server at a time (bounded memory)')
+
+    parser.add_argument('--digest', dest='digest' , action='store_true',
+                        help='send one summary message per search and run (ranked by price) instead of one message per server')
+
+    parser.add_argument('--notify-workers', dest='notify_workers' , nargs=1, required=False, type=int,
+                        default=[4],
+                        help='number of notifications sent concurrently (default 4)')
+
+    parser.add_argument('--notify-rate', dest='notify_rate' , nargs=1, required=False, type=float,
+                        default=[0.0],
+                        help='max notifications per second and provider (default 0 = unlimited)')
+
+    parser.add_argument('--notify-retries', dest='notify_retries' , nargs=1, required=False, type=int,
+                        default=[3],
+                        help='retries for a failed notification (default 3)')
+
+    parser.add_argument('--notify-backoff', dest='notify_backoff' , nargs=1, required=False, type=float,
+                        default=[1.0],
+                        help='delay before the first retry in seconds, doubled on every retry (default 1)')
+
+    parser.add_argument('--searches', dest='searches' , nargs=1, required=False, type=str,
+                        help='search definition file (JSON) - evaluate all searches over a single download of the auction list')
+
+    parser.add_argument('--archive', dest='archive' , nargs=1, required=False, type=str,
+                        help='SQLite snapshot archive - every downloaded auction list is stored (deduplicated, as delta against the previous one)')
+
+    parser.add_argument('--archive-import', dest='archive_import' , nargs='+', required=False, type=str,
+                        help='import snapshot files (e.g. 2024-05-01_12h05-live_data_sb_EUR.json) into --archive and exit')
+
+    parser.add_argument('--archive-export', dest='archive_export' , nargs=1, required=False, type=str,
+                        help='print the auction list from --archive that was current at the given time (unix time or YYYY-MM-DD_HHhMM) and exit')
+
+    parser.add_argument('--history', dest='history' , nargs=1, required=False, type=str,
+                        help='SQLite price history - the price of every server in every downloaded auction list is recorded')
+
+    parser.add_argument('--history-rebuild', dest='history_rebuild' , action='store_true',
+                        help='record all snapshots of --archive into --history and exit')
+
+    parser.add_argument('--history-server', dest='history_server' , nargs=1, required=False, type=str,
+                        help='print the price history of a server from --history and exit')
+
+    parser.add_argument('--history-drops', dest='history_drops' , nargs=1, required=False, type=float,
+                        help='print the servers from --history whose price dropped in the last N hours and exit')
+
+    parser.add_argument('--history-lowest', dest='history_lowest' , nargs=1, required=False, type=str,
+                        help='print the lowest observed price from --history for CPU models containing this text and exit')
+
+    parser.add_argument('--replay', dest='replay' , nargs=1, required=False, type=str,
+                        help='backtest: replay a directory of snapshot files or a snapshot archive and report when each server would first have been notified, then exit')
+
+    parser.add_argument('--replay-from', dest='replay_from' , nargs=1, required=False, type=str,
+                        help='first snapshot time to replay (unix time or YYYY-MM-DD_HHhMM)')
+
+    parser.add_argument('--replay-to', dest='replay_to' , nargs=1, required=False, type=str,
+                        help='last snapshot time to replay (unix time or YYYY-MM-DD_HHhMM)')
+
+    parser.add_argument('--replay-workers', dest='replay_workers' , nargs=1, required=False, type=int,
+                        default=[os.cpu_count() or 1],
+                        help='number of processes used by --replay (default: number of CPUs)')
+
+    parser.add_argument('--watch', dest='watch' , action='store_true',
+                        help='keep running and check the auction list every --interval seconds (stops cleanly on SIGTERM / SIGINT)')
+
+    parser.add_argument('--interval', dest='interval' , nargs=1, required=False, type=float,
+                        default=[300.0],
+                        help='seconds between two runs in watch mode (default 300)')
+
+    parser.add_argument('--jitter', dest='jitter' , nargs=1, required=False, type=float,
+                        default=[30.0],
+                        help='random delay of up to this many seconds added to every interval in watch mode (default 30)')
+
+    parser.add_argument('--wake-on-reduce', dest='wake_on_reduce' , action='store_true',
+                        help='in watch mode, also run right after the next price reduction of servers that only miss a search by --price')
+
+    parser.add_argument('--reduce-margin', dest='reduce_margin' , nargs=1, required=False, type=float,
+                        default=[10.0],
+                        help='only track servers that cost at most this many percent more than --price (default 10)')
+
+    parser.add_argument('--reduce-interval', dest='reduce_interval' , nargs=1, required=False, type=float,
+                        default=[900.0],
+                        help='with --wake-on-reduce, seconds between two runs while the next price reduction is known (default 900, at least --interval)')
+
+    parser.add_argument('--reduce-grace', dest='reduce_grace' , nargs=1, required=False, type=float,
+                        default=[10.0],
+                        help='seconds to wait after a price reduction before checking the auction list (default 10)')
+
+    parser.add_argument('--max-backoff', dest='max_backoff' , nargs=1, required=False, type=float,
+                        default=[3600.0],
+                        help='longest delay in seconds after repeated download errors in watch mode (default 3600)')
+
+    parser.add_argument('--feed-binary', dest='feed_binary' , nargs=1, required=False, type=str,
+                        help='read the servers from this binary auction list (see --feed-binary-write) instead of --data-url, without parsing (requires NumPy)')
+
+    parser.add_argument('--feed-binary-write', dest='feed_binary_write' , nargs=1, required=False, type=str,
+                        help='convert the auction list of --data-url once into a binary auction list for --feed-binary and exit (requires NumPy)')
+
+    parser.add_argument('--rank', dest='rank' , nargs=1, required=False, type=str,
+                        choices=["ram", "disk", "quick", "core"],
+                        help='only keep the --top matches with the lowest price per GB of RAM (ram), per TB of disk (disk), per TB of SSD/NVMe (quick) or per CPU (core)')
+
+    parser.add_argument('--top', dest='top' , nargs=1, required=False, type=int,
+                        default=[10],
+                        help='number of matches kept by --rank among the servers not notified yet (default 10)')
+
+    parser.add_argument('--match-workers', dest='match_workers' , nargs=1, required=False, type=int,
+                        default=[1],
+                        help='number of processes evaluating the searches on parts of the auction list (default 1, requires fork)')
+
+    parser.add_argument('--metrics-prom', dest='metrics_prom' , nargs=1, required=False, type=str,
+                        help='write the duration of every phase and the counters of each run to this Prometheus textfile (node_exporter textfile collector)')
+
+    parser.add_argument('--metrics-json', dest='metrics_json' , nargs=1, required=False, type=str,
+                        help='append the duration of every phase and the counters of each run to this file as one JSON line')
+
+    parser.add_argument('--output', dest='output' , nargs=1, required=False, type=str,
+                        choices=["text", "jsonl", "csv"], default=["text"],
+                        help='output of the matches: text (default), jsonl or csv (one record per match, other messages go to stderr)')
+
+    parser.add_argument('--output-file', dest='output_file' , nargs=1, required=False, type=str,
+                        help='append the records of --output to this file instead of stdout')
+
+    return parser
+
+
+def get_search_criteria(cli_args):
+    # Only the Options that influence which Servers match (Output / Mode Options are left out)
+    return {key: value for key, value in vars(cli_args).items() if key in CRITERIA_OPTIONS}
+
+
+def get_criteria_digest(searches):
+    # Fingerprint of the Criteria of all Searches: State derived from a previous Run is only valid for the same Criteria
+    return hashlib.sha1(json.dumps([get_search_criteria(search.cli_args) for search in searches], sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def set_print_level(cli_args):
+    global PRINT_VERBOSE
+    global PRINT_DEBUG
 
     # Set PRINT Level
     if cli_args.debug:
@@ -673,260 +2638,1305 @@ if __name__ == "__main__":
         PRINT_VERBOSE = True
         PRINT_DEBUG = True
 
-    # Array to Store Found Matches
-    foundServers = []
-        
 
-    if PRINT_DEBUG:
-        print(f"Debug: {cli_args.debug} , Verbose: {cli_args.verbose} , Quiet: {cli_args.quiet}")
+def get_default_state_file(state_file, label):
+    # Derive a State File for each Search from the Default one (e.g. /tmp/hah.txt -> /tmp/hah-<label>.txt)
+    root, ext = os.path.splitext(state_file)
+    return f"{root}-{label}{ext}"
+
+
+def load_searches(filename, parser, cli_args):
+    # The Search Definition File is either a JSON Array or JSON Lines (one Search per Line)
+    # Each Search is an Object with the following Keys:
+    # - label: name of the Search (required)
+    # - criteria: Command Line Arguments of hah.py, either as a String or as a List
+    # - provider: Notifiers provider name (optional, defaults to --provider in the criteria, then to --provider)
+    # - state_file: State File (optional, defaults to -f in the criteria, then to -f with the label appended)
+    with open(filename) as fh:
+        content = fh.read()
+
+    if content.lstrip().startswith("["):
+        definitions = json.loads(content)
+    else:
+        definitions = [json.loads(line) for line in content.splitlines() if line.strip()]
 
+    # Initialize Variable
+    searches = []
 
-    if not cli_args.test_mode:
-        f = open(cli_args.f, 'a+')
-        idsProcessed = open(cli_args.f).read()
-        if cli_args.provider[0] == "dummy":
-            notifier = None
+    for definition in definitions:
+        label = definition["label"]
+
+        # Criteria can be written exactly like on the Command Line
+        criteria = definition.get("criteria", [])
+        if isinstance(criteria, str):
+            criteria = shlex.split(criteria)
+
+        # Use the same Parser as the Command Line so that every Option is supported
+        # --provider and -f are preset to None (argparse keeps preset Values), so that they are only set if the Criteria contain them
+        search_args = parser.parse_args([str(criterion) for criterion in criteria], namespace=argparse.Namespace(provider=None, f=None))
+
+        # Provider and State File are either a Key of the Search or an Option in its Criteria, not both
+        if "provider" in definition and search_args.provider is not None:
+            print(f"Search {label}: the provider is defined both as \"provider\" and as --provider in the criteria")
+            exit(1)
+
+        if "state_file" in definition and search_args.f is not None:
+            print(f"Search {label}: the state file is defined both as \"state_file\" and as -f in the criteria")
+            exit(1)
+
+        # Provider defined in the Search has Priority over the Command Line one (a List or comma-separated)
+        if search_args.provider is not None:
+            provider = search_args.provider[0]
         else:
-            notifier = notifiers.get_notifier(cli_args.provider[0])
+            provider = definition.get("provider", cli_args.provider[0])
+        search_args.provider = [",".join(provider) if isinstance(provider, list) else provider]
 
-    servers = None
-    try:
-        s = requests.Session()
+        # Delivery Options of the Command Line apply to every Search, a Search can also enable them in its own Criteria
+        search_args.digest = search_args.digest or cli_args.digest
+        search_args.send_payload = search_args.send_payload or cli_args.send_payload
+
+        if search_args.f is not None:
+            state_file = search_args.f
+        else:
+            state_file = definition.get("state_file", get_default_state_file(cli_args.f, label))
+        search_args.f = state_file
+
+        searches.append(Search(label, search_args, state_file, test_mode=cli_args.test_mode))
+
+    return searches
+
+
+def get_session(data_url=None):
+    s = requests.Session()
+
+    # Local Auction Lists (Tests and Benchmarks)
+    if data_url is None or data_url.startswith("file://"):
+        import requests_file
         s.mount('file://', requests_file.FileAdapter())
-        rsp = s.get(cli_args.data_url[0], headers={
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.3 Safari/605.1.15'})
-        servers = json.loads(rsp.text)['server']
+
+    s.headers.update({
+        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.3 Safari/605.1.15',
+        'Accept-Encoding': 'gzip, deflate'})
+    return s
+
+
+# Define Record Writer Class
+# Streams one Record per Match (--output jsonl / csv) to stdout or to --output-file
+class RecordWriter:
+    # CSV Columns of the Records of Matches (see Analysis.get_record, rank and value only for --rank)
+    MATCH_FIELDS = ["search", "id", "price", "datacenter", "cpu", "cpu_count", "ram", "ram_description",
+                    "disk", "disk_count", "disk_total_size", "disk_quick_total_size", "specials", "url", "criteria",
+                    "rank", "value"]
+
+    # CSV Columns of the Records of --replay (first Notification of every Server)
+    REPLAY_FIELDS = ["search", "timestamp", "first_notified", "id", "price", "cpu", "datacenter"]
+
+    def __init__(self, format, filename=None, fields=MATCH_FIELDS):
+        self.format = format
+        self.filename = filename
+
+        # Fixed CSV Columns, so that the Header does not depend on the first Record (missing Values stay empty)
+        self.fields = fields
+        self.writer = None
+
+        # Records are appended, so that repeated Runs (Watch Mode, Cron) add to the same File
+        if filename is None:
+            self.fh = sys.stdout
+            self.has_header = False
+        else:
+            self.fh = open(filename, "a", newline="", encoding="utf-8")
+            self.has_header = self.fh.tell() > 0
+
+    def write(self, record):
+        if self.format == "jsonl":
+            self.fh.write(json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n")
+            return
+
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.fh, fieldnames=self.fields, restval="")
+            if not self.has_header:
+                self.writer.writeheader()
+                self.has_header = True
+
+        # Nested Values (Criteria, Specials) are stored as JSON in their Cell
+        self.writer.writerow({key: json.dumps(value, separators=(",", ":")) if isinstance(value, (dict, list)) else value
+                              for key, value in record.items()})
+
+    def flush(self):
+        self.fh.flush()
+
+    def close(self):
+        if self.filename is None:
+            self.fh.flush()
+        else:
+            self.fh.close()
+
+
+# Raised when the Auction List cannot be downloaded or parsed
+# A single Run exits, Watch Mode retries later
+class FeedError(Exception):
+    pass
+
+
+def download_feed(session, data_url, cache=None, stream=False):
+    # With stream=True the Body is returned as an Iterator of Chunks instead of Bytes
+    try:
+        if cache is not None:
+            body, digest, modified = cache.fetch(session, data_url, stream=stream)
+        elif stream:
+            rsp = session.get(data_url, stream=True)
+            rsp.raise_for_status()
+            body = rsp.iter_content(FEED_CHUNK_SIZE)
+            digest = None
+        else:
+            rsp = session.get(data_url)
+            rsp.raise_for_status()
+            body = rsp.content
+            digest = None
     except Exception as e:
         print('Failed to download auction list')
         print(e)
-        exit(1)
+        raise FeedError(e)
 
-    for server_raw in servers:
-        tax_percent = cli_args.tax_percent[0] if not cli_args.exclude_tax else 0.0
-        analysis = Analysis(server_raw, tax_percent)
-
-        # Store Command Line Arguments in Server class
-        # Store as either "Match" or "Exclude" depending on the Argument
-        for key in cli_args.__dict__:
-            # Get Value for this Argument
-            value = getattr(cli_args , key)
-
-            # Check for --match or at least no "--exclude"
-            if ("match" in key) or ("exclude" not in key):
-                # Adapt key name for self.match[key] addressing
-                name = key.replace("match_" , "")
-
-                # Only store if the key already exist
-                # This filters out Meta Values / Command Line Options (e.g. --tax or --exclude-tax)
-                if name in analysis.matchcriteria:
-                    # Add key to match
-                    analysis.matchcriteria[name] = value
-
-            # Check for --exclude
-            if ("exclude" in key):
-                # Adapt key name for self.match[key] addressing
-                name = key.replace("exclude_" , "")
-
-                # Only store if the key already exist
-                # This filters out Meta Values / Command Line Options (e.g. --tax or --exclude-tax)
-                if name in analysis.excludecriteria:
-                    # Add key to exclude
-                    analysis.excludecriteria[name] = value
-
-        # Tax Percent Match and Exclude make no Sense so just set to None
-        analysis.matchcriteria["tax_percent"] = None
-        analysis.excludecriteria["tax_percent"] = None
-
-        if cli_args.debug:
-            print(json.dumps(server_raw))
-        if not cli_args.test_mode and str(analysis.id) in idsProcessed:
-            continue
+    return body, digest
 
 
-        # Match ID (useful for debugging)
-        # Must be converted to Integer
-        # If this is not DONE then the evaluation (analysis.id in matchingIDs) below will NOT work
-        analysis.matchresult['id'] = True
-        if cli_args.id is not None:
-            matchingIDs = cli_args.id[0].split(",")
-            for i in range(0, len(matchingIDs)):
-                matchingIDs[i] = int(matchingIDs[i])
-        
-            analysis.matchresult['id'] = False if cli_args.id else True
-            if analysis.id in matchingIDs:
-                analysis.matchresult['id'] = True
+def parse_document(body):
+    document = None
+    try:
+        document = json.loads(body)
+        document['server']
+    except Exception as e:
+        print('Failed to parse auction list')
+        print(e)
+        raise FeedError(e)
 
+    return document
 
-        # Match Datacenter
-        analysis.matchresult['datacenter'] = False if cli_args.datacenter else True
-        if cli_args.datacenter is not None and cli_args.datacenter[0] in analysis.datacenter:
-            analysis.matchresult['datacenter'] = True
 
-        # Match Price
-        analysis.matchresult['price'] = analysis.price <= cli_args.price[0] if cli_args.price else True
+def open_binary_feed(filename):
+    try:
+        return FeedColumns.load(filename, get_numpy())
+    except Exception as e:
+        print('Failed to open binary auction list')
+        print(e)
+        raise FeedError(e)
+
+
+def parse_servers(body):
+    return parse_document(body)['server']
 
-        # Match CPU Count
-        analysis.matchresult['cpu_count'] = analysis.cpu_count >= cli_args.cpu_count[
-            0] if cli_args.cpu_count else True
 
+def stream_servers(chunks):
+    # Yield the Servers one by one while the Auction List is being read
+    try:
+        yield from FeedStream(chunks).iter_servers()
+    except Exception as e:
+        print('Failed to parse auction list')
+        print(e)
+        raise FeedError(e)
+
+
+def parse_timestamp(value):
+    # Unix Time or a local Date/Time (same Format as the Snapshot File Names of functions.sh, or ISO)
+    if value.isdigit():
+        return int(value)
+
+    for timestamp_format in ["%Y-%m-%d_%Hh%M", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M", "%Y-%m-%d %H:%M", "%Y-%m-%d"]:
+        try:
+            return int(time.mktime(time.strptime(value, timestamp_format)))
+        except ValueError:
+            pass
 
-        # Match RAM Size
-        analysis.matchresult['ram_size'] = analysis.ram_size >= cli_args.ram_size[0] if cli_args.ram_size else True
+    print(f"Invalid timestamp: {value}")
+    exit(1)
 
 
+def get_file_timestamp(filename):
+    # Snapshots written by functions.sh are named like 2024-05-01_12h05-live_data_sb_EUR.json
+    match = re.search(r"\d{4}-\d{2}-\d{2}_\d{2}h\d{2}", os.path.basename(filename))
+    if match:
+        return parse_timestamp(match.group(0))
 
+    return int(os.path.getmtime(filename))
 
-        # Match General Disk Count
-        analysis.matchresult['disk_general_count'] = analysis.disk_general_count >= cli_args.disk_general_count[0] if cli_args.disk_general_count else True
 
-        # Match General Total Disk Size
-        analysis.matchresult['disk_general_total_size'] = analysis.disk_general_total_size >= cli_args.disk_general_total_size[0] if cli_args.disk_general_total_size else True
+def import_snapshots(archive, filenames, history=None):
+    # Oldest first, so that every Snapshot is stored as a Delta against the previous one
+    files = sorted((get_file_timestamp(filename), filename) for filename in filenames)
 
-        # Match General Each Disk Size
-        analysis.matchresult['disk_general_each_size'] = analysis.disk_general_each_size >= cli_args.disk_general_each_size[0] if cli_args.disk_general_each_size else True
+    # Initialize Variable
+    stored = 0
 
+    for timestamp, filename in files:
+        with open(filename, "rb") as f:
+            document = parse_document(f.read())
 
+        if archive.add(timestamp, document):
+            stored += 1
 
+        if history is not None:
+            history.ingest(timestamp, document['server'])
 
-        # Match Quick Disk (SSD/NVME)
-        analysis.matchresult['disk_quick'] = analysis.has_quick_disk() if cli_args.disk_quick else True
+        if PRINT_DEBUG:
+            print(f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(timestamp))} {filename}")
+
+    print(f"Imported {len(files)} snapshot file(s): {stored} stored, {len(files) - stored} unchanged")
+    print(archive.get_summary())
+    if history is not None:
+        print(history.get_summary())
+
+
+def format_timestamp(timestamp):
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(timestamp))
+
+
+def query_history(history, cli_args):
+    # Answer one Query of the Price History as a Table
+    # Prices are shown including Tax, like everywhere else
+    tax_percent = cli_args.tax_percent[0] if not cli_args.exclude_tax else 0.0
+
+    def get_price(price):
+        return f"{price*(100+tax_percent)/100:.2f}" if price is not None else ""
+
+    # Initialize Table
+    from texttable import Texttable
+    t = Texttable()
+    t.set_max_width(0)
+
+    if cli_args.history_server:
+        server_id = int(cli_args.history_server[0])
+        header = ["Time", "Price", "Next Reduction"]
+        data = [[format_timestamp(timestamp), get_price(price), format_timestamp(next_reduce_timestamp) if next_reduce_timestamp else ""]
+                for timestamp, price, next_reduce_timestamp in history.get_trajectory(server_id)]
+        title = f"Price history of server #{server_id}"
+    elif cli_args.history_drops:
+        # Relative to the latest Snapshot in the History, so that imported Archives can be queried as well
+        latest = history.get_latest_timestamp() or 0
+        since = latest - cli_args.history_drops[0]*3600
+        header = ["Time", "Server", "CPU", "Datacenter", "Previous Price", "Price"]
+        data = [[format_timestamp(timestamp), server_id, cpu, datacenter, get_price(previous_price), get_price(price)]
+                for server_id, cpu, datacenter, timestamp, previous_price, price in history.get_drops(since)]
+        title = f"Price drops since {format_timestamp(since)}"
+    else:
+        header = ["CPU", "Lowest Price", "Server", "Servers seen"]
+        data = [[cpu, get_price(price), server_id, count] for cpu, price, server_id, count in history.get_lowest(cli_args.history_lowest[0])]
+        title = f"Lowest observed price for CPU {cli_args.history_lowest[0]}"
+
+    print(f"{title}: {len(data)} row(s)")
+    if len(data) > 0:
+        t.set_cols_dtype(["t"] * len(header))
+        t.add_rows([header] + data, header=True)
+        print(t.draw())
+
+
+def iter_file_chunks(f):
+    with f:
+        while True:
+            chunk = f.read(FEED_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def apply_criteria(analysis, cli_args):
+    # The same Analysis can be checked against several Searches, so start from a clean State
+    analysis.reset_criteria()
+
+    # Store Command Line Arguments in Server class
+    # Store as either "Match" or "Exclude" depending on the Argument
+    for key in cli_args.__dict__:
+        # Get Value for this Argument
+        value = getattr(cli_args , key)
+
+        # Check for --match or at least no "--exclude"
+        if ("match" in key) or ("exclude" not in key):
+            # Adapt key name for self.match[key] addressing
+            name = key.replace("match_" , "")
+
+            # Only store if the key already exist
+            # This filters out Meta Values / Command Line Options (e.g. --tax or --exclude-tax)
+            if name in analysis.matchcriteria:
+                # Add key to match
+                analysis.matchcriteria[name] = value
+
+        # Check for --exclude
+        if ("exclude" in key):
+            # Adapt key name for self.match[key] addressing
+            name = key.replace("exclude_" , "")
+
+            # Only store if the key already exist
+            # This filters out Meta Values / Command Line Options (e.g. --tax or --exclude-tax)
+            if name in analysis.excludecriteria:
+                # Add key to exclude
+                analysis.excludecriteria[name] = value
+
+    # Tax Percent Match and Exclude make no Sense so just set to None
+    analysis.matchcriteria["tax_percent"] = None
+    analysis.excludecriteria["tax_percent"] = None
+
+
+    # Match ID (useful for debugging)
+    # Must be converted to Integer
+    # If this is not DONE then the evaluation (analysis.id in matchingIDs) below will NOT work
+    analysis.matchresult['id'] = True
+    if cli_args.id is not None:
+        matchingIDs = cli_args.id[0].split(",")
+        for i in range(0, len(matchingIDs)):
+            matchingIDs[i] = int(matchingIDs[i])
+    
+        analysis.matchresult['id'] = False if cli_args.id else True
+        if analysis.id in matchingIDs:
+            analysis.matchresult['id'] = True
 
-        # Match Quick Disk Count
-        analysis.matchresult['disk_quick_count'] = analysis.disk_quick_count >= cli_args.disk_quick_count[0] if cli_args.disk_quick_count else True
 
-        # Match Quick Total Disk Size
-        analysis.matchresult['disk_quick_total_size'] = analysis.disk_quick_total_size >= cli_args.disk_quick_total_size[0] if cli_args.disk_quick_total_size else True
+    # Match Datacenter
+    analysis.matchresult['datacenter'] = False if cli_args.datacenter else True
+    if cli_args.datacenter is not None and cli_args.datacenter[0] in analysis.datacenter:
+        analysis.matchresult['datacenter'] = True
 
-        # Match Quick Each Disk Size
-        analysis.matchresult['disk_quick_each_size'] = analysis.disk_quick_each_size >= cli_args.disk_quick_each_size[0] if cli_args.disk_quick_each_size else True
+    # Match Price
+    analysis.matchresult['price'] = analysis.price <= cli_args.price[0] if cli_args.price else True
 
+    # Match CPU Count
+    analysis.matchresult['cpu_count'] = analysis.cpu_count >= cli_args.cpu_count[
+        0] if cli_args.cpu_count else True
 
 
-        # Match HDD Disk
-        analysis.matchresult['disk_hdd'] = analysis.has_hdd_disk() if cli_args.disk_hdd else True
+    # Match RAM Size
+    analysis.matchresult['ram_size'] = analysis.ram_size >= cli_args.ram_size[0] if cli_args.ram_size else True
 
-        # Match HDD Disk Count
-        analysis.matchresult['disk_hdd_count'] = analysis.disk_hdd_count >= cli_args.disk_hdd_count[0] if cli_args.disk_hdd_count else True
 
-        # Match HDD Total Disk Size
-        analysis.matchresult['disk_hdd_total_size'] = analysis.disk_hdd_total_size >= cli_args.disk_hdd_total_size[0] if cli_args.disk_hdd_total_size else True
 
-        # Match HDD Each Disk Size
-        analysis.matchresult['disk_hdd_each_size'] = analysis.disk_hdd_each_size >= cli_args.disk_hdd_each_size[0] if cli_args.disk_hdd_each_size else True
 
+    # Match General Disk Count
+    analysis.matchresult['disk_general_count'] = analysis.disk_general_count >= cli_args.disk_general_count[0] if cli_args.disk_general_count else True
 
-        # Match SSD Disk
-        analysis.matchresult['disk_ssd'] = analysis.has_ssd_disk() if cli_args.disk_ssd else True
+    # Match General Total Disk Size
+    analysis.matchresult['disk_general_total_size'] = analysis.disk_general_total_size >= cli_args.disk_general_total_size[0] if cli_args.disk_general_total_size else True
 
-        # Match SSD Disk Count
-        analysis.matchresult['disk_ssd_count'] = analysis.disk_ssd_count >= cli_args.disk_ssd_count[0] if cli_args.disk_ssd_count else True
+    # Match General Each Disk Size
+    analysis.matchresult['disk_general_each_size'] = analysis.disk_general_each_size >= cli_args.disk_general_each_size[0] if cli_args.disk_general_each_size else True
 
-        # Match SSD Total Disk Size
-        analysis.matchresult['disk_ssd_total_size'] = analysis.disk_ssd_total_size >= cli_args.disk_ssd_total_size[0] if cli_args.disk_ssd_total_size else True
 
-        # Match SSD Each Disk Size
-        analysis.matchresult['disk_ssd_each_size'] = analysis.disk_ssd_each_size >= cli_args.disk_ssd_each_size[0] if cli_args.disk_ssd_each_size else True
 
 
-        # Match NVME Disk
-        analysis.matchresult['disk_nvme'] = analysis.has_nvme_disk() if cli_args.disk_nvme else True
+    # Match Quick Disk (SSD/NVME)
+    analysis.matchresult['disk_quick'] = analysis.has_quick_disk() if cli_args.disk_quick else True
 
-        # Match NVME Disk Count
-        analysis.matchresult['disk_nvme_count'] = analysis.disk_nvme_count >= cli_args.disk_nvme_count[0] if cli_args.disk_nvme_count else True
+    # Match Quick Disk Count
+    analysis.matchresult['disk_quick_count'] = analysis.disk_quick_count >= cli_args.disk_quick_count[0] if cli_args.disk_quick_count else True
 
-        # Match NVME Total Disk Size
-        analysis.matchresult['disk_nvme_total_size'] = analysis.disk_nvme_total_size >= cli_args.disk_nvme_total_size[0] if cli_args.disk_nvme_total_size else True
+    # Match Quick Total Disk Size
+    analysis.matchresult['disk_quick_total_size'] = analysis.disk_quick_total_size >= cli_args.disk_quick_total_size[0] if cli_args.disk_quick_total_size else True
 
-        # Match NVME Each Disk Size
-        analysis.matchresult['disk_nvme_each_size'] = analysis.disk_nvme_each_size >= cli_args.disk_nvme_each_size[0] if cli_args.disk_nvme_each_size else True
+    # Match Quick Each Disk Size
+    analysis.matchresult['disk_quick_each_size'] = analysis.disk_quick_each_size >= cli_args.disk_quick_each_size[0] if cli_args.disk_quick_each_size else True
 
 
 
+    # Match HDD Disk
+    analysis.matchresult['disk_hdd'] = analysis.has_hdd_disk() if cli_args.disk_hdd else True
 
-        # Match Special - Hardware Raid
-        analysis.matchresult['sp_hw_raid'] = analysis.sp_hw_raid if cli_args.sp_hw_raid else True
+    # Match HDD Disk Count
+    analysis.matchresult['disk_hdd_count'] = analysis.disk_hdd_count >= cli_args.disk_hdd_count[0] if cli_args.disk_hdd_count else True
 
-        # Match Special - Redundant PSU
-        analysis.matchresult['sp_red_psu'] = analysis.sp_red_psu if cli_args.sp_red_psu else True
+    # Match HDD Total Disk Size
+    analysis.matchresult['disk_hdd_total_size'] = analysis.disk_hdd_total_size >= cli_args.disk_hdd_total_size[0] if cli_args.disk_hdd_total_size else True
 
-        # Match Special - ECC RAM
-        analysis.matchresult['sp_ecc'] = analysis.sp_ecc if cli_args.sp_ecc else True
+    # Match HDD Each Disk Size
+    analysis.matchresult['disk_hdd_each_size'] = analysis.disk_hdd_each_size >= cli_args.disk_hdd_each_size[0] if cli_args.disk_hdd_each_size else True
 
-        # Match Special - GPU
-        analysis.matchresult['sp_gpu'] = analysis.sp_gpu if cli_args.sp_gpu else True
 
-        # Match Special - IPv4
-        analysis.matchresult['sp_ipv4'] = analysis.sp_ipv4 if cli_args.sp_ipv4 else True
+    # Match SSD Disk
+    analysis.matchresult['disk_ssd'] = analysis.has_ssd_disk() if cli_args.disk_ssd else True
 
-        # Match Special - Intel NIC
-        analysis.matchresult['sp_inic'] = analysis.sp_inic if cli_args.sp_inic else True
+    # Match SSD Disk Count
+    analysis.matchresult['disk_ssd_count'] = analysis.disk_ssd_count >= cli_args.disk_ssd_count[0] if cli_args.disk_ssd_count else True
 
+    # Match SSD Total Disk Size
+    analysis.matchresult['disk_ssd_total_size'] = analysis.disk_ssd_total_size >= cli_args.disk_ssd_total_size[0] if cli_args.disk_ssd_total_size else True
 
-        # Match Specific CPUs
-        # False by default unless Match is found
-        analysis.matchresult['cpu_description'] = False
-        if cli_args.match_cpu_description:
+    # Match SSD Each Disk Size
+    analysis.matchresult['disk_ssd_each_size'] = analysis.disk_ssd_each_size >= cli_args.disk_ssd_each_size[0] if cli_args.disk_ssd_each_size else True
 
-            # Split Possible Matches
-            # Make sure both the Description and Search Criteria are lowercase in order not to miss any potential Match
-            selected_cpu_matches = cli_args.match_cpu_description[0].lower().split(",")
 
-            # Try to see if any Match allowed is found
-            for cpu in selected_cpu_matches:
-                if cpu in analysis.cpu_description.lower():
-                    # Found match
-                    analysis.matchresult['cpu_description'] = True
-        else:
-            # Not Required
-            analysis.matchresult['cpu_description'] = True
+    # Match NVME Disk
+    analysis.matchresult['disk_nvme'] = analysis.has_nvme_disk() if cli_args.disk_nvme else True
+
+    # Match NVME Disk Count
+    analysis.matchresult['disk_nvme_count'] = analysis.disk_nvme_count >= cli_args.disk_nvme_count[0] if cli_args.disk_nvme_count else True
+
+    # Match NVME Total Disk Size
+    analysis.matchresult['disk_nvme_total_size'] = analysis.disk_nvme_total_size >= cli_args.disk_nvme_total_size[0] if cli_args.disk_nvme_total_size else True
 
+    # Match NVME Each Disk Size
+    analysis.matchresult['disk_nvme_each_size'] = analysis.disk_nvme_each_size >= cli_args.disk_nvme_each_size[0] if cli_args.disk_nvme_each_size else True
 
-        # Exclude Specific CPUs
-        # True by default unless Match is found
+
+
+
+    # Match Special - Hardware Raid
+    analysis.matchresult['sp_hw_raid'] = analysis.sp_hw_raid if cli_args.sp_hw_raid else True
+
+    # Match Special - Redundant PSU
+    analysis.matchresult['sp_red_psu'] = analysis.sp_red_psu if cli_args.sp_red_psu else True
+
+    # Match Special - ECC RAM
+    analysis.matchresult['sp_ecc'] = analysis.sp_ecc if cli_args.sp_ecc else True
+
+    # Match Special - GPU
+    analysis.matchresult['sp_gpu'] = analysis.sp_gpu if cli_args.sp_gpu else True
+
+    # Match Special - IPv4
+    analysis.matchresult['sp_ipv4'] = analysis.sp_ipv4 if cli_args.sp_ipv4 else True
+
+    # Match Special - Intel NIC
+    analysis.matchresult['sp_inic'] = analysis.sp_inic if cli_args.sp_inic else True
+
+
+    # Match / Exclude Specific CPUs
+    # Both are satisfied unless the Search filters by CPU (see CpuMatcher)
+    cpu_matcher = get_cpu_matcher(cli_args)
+    if cpu_matcher is not None:
+        matched, excluded = cpu_matcher.get_result(analysis.cpu_description)
+        analysis.matchresult['cpu_description'] = matched
+        analysis.excluderesult['cpu_description'] = not excluded
+    else:
+        # Not Required
+        analysis.matchresult['cpu_description'] = True
         analysis.excluderesult['cpu_description'] = True
-        if cli_args.exclude_cpu_description:
-            # Split Possible Matches
-            # Make sure both the Description and Search Criteria are lowercase in order not to miss any potential Match
-            selected_cpu_exclusions = cli_args.exclude_cpu_description[0].lower().split(",")
-
-            # Try to see if any Match allowed is found
-            for cpu in selected_cpu_exclusions:
-                if cpu in analysis.cpu_description.lower():
-                    # Found exclusion match
-                    analysis.excluderesult['cpu_description'] = False
+
+
+
+    # Update the Overall Criteria (XXX_resulkt = XXX_matches and XXX_excludes)
+    analysis.computeOverallResult()
+
+    # Check if Server Satisfies all Criteria of Match+Exclude
+    return analysis.fitRequirements()
+
+
+def run_searches(searches, servers, debug=False, verbose=None):
+    # Single Pass over the Auction List: every Server is checked against every Search
+    # verbose: fill the per-Property Results of Matches for Display (defaults to PRINT_VERBOSE)
+    if verbose is None:
+        verbose = PRINT_VERBOSE
+
+    for server_raw in servers:
+        if debug:
+            print(json.dumps(server_raw))
+
+        # Build each Analysis only once per Server (and Tax Rate, since the Price depends on it)
+        analyses = dict()
+
+        for search in searches:
+            analysis = analyses.get(search.tax_percent)
+            if analysis is None:
+                analysis = Analysis(server_raw, search.tax_percent)
+                analyses[search.tax_percent] = analysis
+
+            # Debug Mode evaluates every Criterion of every Server to show the complete Analysis
+            if debug:
+                matched = search.plan.explain(analysis)
+            else:
+                matched = search.plan.matches(analysis)
+
+                # Per-Property Results are only needed to display the Analysis of Matches
+                # (only of the best Matches for ranking Searches, see rank_matches)
+                if matched and verbose and search.rank is None:
+                    search.plan.explain(analysis)
+
+            if matched:
+                # Store a Copy if the per-Property Results were filled, since the Analysis is reused by the next Search
+                search.foundServers.append(analysis.snapshot() if debug or (verbose and search.rank is None) else analysis)
+            elif search.plan.near_price is not None and search.plan.is_near_miss(analysis):
+                search.nearMisses[analysis.id] = server_raw["next_reduce_timestamp"]
+
+
+# Define Reduce Schedule Class
+# Next Price Reduction of every Server that only misses a Search by its Price (--wake-on-reduce)
+# Watch Mode re-checks the Auction List right after the earliest one instead of waiting for the next Interval
+class ReduceSchedule:
+    def __init__(self, searches, margin):
+        # The Near Misses are collected by the Matching Pass of every Run (Search.nearMisses)
+        for search in searches:
+            search.plan.track_near_misses(margin)
+
+        # {Server ID: Timestamp of the next Price Reduction}
+        self.reductions = dict()
+
+    def update(self, searches, changed=None):
+        # changed: only these Servers were matched (new / changed Servers, see --diff-state), the others keep their Reduction
+        # None if the whole Auction List was matched
+        # Returns the Number of Near Misses
+        if changed is None:
+            self.reductions.clear()
         else:
-            # Not Required
-            analysis.excluderesult['cpu_description'] = True
+            for server_raw in changed:
+                self.reductions.pop(server_raw.get("id", 0), None)
+
+        for search in searches:
+            self.reductions.update(search.nearMisses)
+
+        return len(self.reductions)
+
+    def get_next(self, now):
+        # Earliest upcoming Reduction and the Number of Servers reduced at that Time (None if there is none)
+        # Past Reductions are forgotten: the Run after them has already seen the new Price (or the Server is gone)
+        self.reductions = {server_id: timestamp for server_id, timestamp in self.reductions.items() if timestamp > now}
+        if len(self.reductions) == 0:
+            return None, 0
+
+        timestamp = min(self.reductions.values())
+        return timestamp, sum(1 for value in self.reductions.values() if value == timestamp)
+
+
+# Auction List and Searches of run_searches_parallel: inherited by the Worker Processes through fork, never pickled
+PARALLEL_STATE = None
+
+
+def match_range(start, end):
+    # Worker: every Match of the Servers in [start, end) as (Server Index, Indices of the matching Searches,
+    # Indices of the Searches the Server only misses by its Price - see CriteriaPlan.track_near_misses)
+    servers, searches = PARALLEL_STATE
+
+    # Initialize Variable
+    matches = []
+
+    for index in range(start, end):
+        # Build each Analysis only once per Server (and Tax Rate)
+        analyses = dict()
+        matched = []
+        missed = []
+
+        for search_index, search in enumerate(searches):
+            analysis = analyses.get(search.tax_percent)
+            if analysis is None:
+                analysis = Analysis(servers[index], search.tax_percent)
+                analyses[search.tax_percent] = analysis
 
+            if search.plan.matches(analysis):
+                matched.append(search_index)
+            elif search.plan.near_price is not None and search.plan.is_near_miss(analysis):
+                missed.append(search_index)
 
+        if len(matched) > 0 or len(missed) > 0:
+            matches.append((index, matched, missed))
 
-        # Update the Overall Criteria (XXX_resulkt = XXX_matches and XXX_excludes)
-        analysis.computeOverallResult()
+    return matches
 
-        # Check if Server Satisfies all Criteria of Match+Exclude
-        if analysis.fitRequirements():
-            # Store Element in Array
-            foundServers.append(analysis)
-            
+
+def run_searches_parallel(searches, servers, workers):
+    # Spread contiguous Ranges of the Auction List over a Pool of forked Processes
+    # Only the Indices of the Matches are sent back, the Analysis of a Match is built (and explained) in this Process,
+    # in the Order of the Auction List, so that the Matches are exactly the same as with a single Process
+    # The Process must not run other Threads while forking (see NotificationDispatcher.release)
+    global PARALLEL_STATE
+    import multiprocessing
+
+    # Without fork the whole Auction List would have to be pickled to every Worker
+    if "fork" not in multiprocessing.get_all_start_methods():
+        run_searches(searches, servers)
+        return
+
+    servers = list(servers)
+
+    # More Chunks than Workers, so that a slow Chunk does not keep the other Workers idle
+    chunk_count = min(len(servers), workers * 4)
+    starts = [len(servers) * i // chunk_count for i in range(chunk_count)]
+    ends = [len(servers) * (i + 1) // chunk_count for i in range(chunk_count)]
+
+    PARALLEL_STATE = (servers, searches)
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork")) as executor:
+            results = list(executor.map(match_range, starts, ends))
+    finally:
+        PARALLEL_STATE = None
+
+    for matches in results:
+        for index, search_indices, missed_indices in matches:
+            for search_index in missed_indices:
+                searches[search_index].nearMisses[servers[index]["id"]] = servers[index]["next_reduce_timestamp"]
+
+            # Build each Analysis only once per Server (and Tax Rate)
+            analyses = dict()
+
+            for search_index in search_indices:
+                search = searches[search_index]
+                analysis = analyses.get(search.tax_percent)
+                if analysis is None:
+                    analysis = Analysis(servers[index], search.tax_percent)
+                    analyses[search.tax_percent] = analysis
+
+                # Per-Property Results are only needed to display the Analysis of Matches (see run_searches)
+                if PRINT_VERBOSE and search.rank is None:
+                    search.plan.explain(analysis)
+                    search.foundServers.append(analysis.snapshot())
+                else:
+                    search.foundServers.append(analysis)
+
+
+def run_searches_columnar(searches, columns):
+    # The whole Auction List is loaded into Column Arrays only once for all Searches
+    servers = columns.servers
+
+    # Build each Analysis only once per Server (and Tax Rate), and only for Servers that survive the Masks
+    analyses = dict()
+
+    for search in searches:
+        # Numeric and Flag Criteria for all Servers at once (up to the Price of a Near Miss, see CriteriaPlan.track_near_misses)
+        mask = columns.get_mask(search.plan, search.tax_percent)
+
+        for index in columns.np.flatnonzero(mask):
+            index = int(index)
+            analysis = analyses.get((index, search.tax_percent))
+            if analysis is None:
+                analysis = Analysis(servers[index], search.tax_percent)
+                analyses[(index, search.tax_percent)] = analysis
+
+            # The Plan is checked again (CPU Descriptions and everything else) so both Engines give the same Result
+            if search.plan.matches(analysis):
+                # Per-Property Results are only needed to display the Analysis of Matches
+                if PRINT_VERBOSE and search.rank is None:
+                    search.plan.explain(analysis)
+
+                # Store a Copy if the per-Property Results were filled, since the Analysis is reused by the next Search
+                search.foundServers.append(analysis.snapshot() if PRINT_VERBOSE and search.rank is None else analysis)
+            elif search.plan.near_price is not None and search.plan.is_near_miss(analysis):
+                search.nearMisses[analysis.id] = analysis.server_raw["next_reduce_timestamp"]
+
+
+def get_replay_snapshots(source, start=None, end=None):
+    # Snapshots to replay in chronological Order: (Timestamp, Filename) for a Directory of Snapshot Files, (Timestamp, None) for an Archive
+    if os.path.isdir(source):
+        snapshots = sorted((get_file_timestamp(os.path.join(source, filename)), os.path.join(source, filename))
+                           for filename in os.listdir(source) if filename.endswith(".json"))
+        return [(timestamp, filename) for timestamp, filename in snapshots
+                if (start is None or timestamp >= start) and (end is None or timestamp <= end)]
+
+    archive = SnapshotArchive(source)
+    snapshots = [(timestamp, None) for timestamp in archive.get_timestamps(start, end)]
+    archive.close()
+    return snapshots
+
+
+def iter_replay_snapshots(source, snapshots):
+    # Yield (Timestamp, List of Servers)
+    if os.path.isdir(source):
+        for timestamp, filename in snapshots:
+            with open(filename, "rb") as f:
+                yield timestamp, parse_servers(f.read())
+    else:
+        # Consecutive Snapshots of the Archive only cost one Delta each
+        archive = SnapshotArchive(source)
+        for timestamp, document in archive.iter_snapshots(snapshots[0][0], snapshots[-1][0]):
+            yield timestamp, document['server']
+        archive.close()
+
+
+def replay_chunk(source, snapshots, definitions):
+    # Runs in a Worker Process: evaluate all Searches over a contiguous Range of Snapshots
+    # Returns for every Search the first Match of every Server: {Server ID: (Timestamp, Price, CPU, Datacenter)}
+    searches = [Search(label, search_args, None, test_mode=True) for label, search_args in definitions]
+    first_matches = [dict() for search in searches]
+
+    # Only Servers that are new or changed since the previous Snapshot can give a new Match
+    # (same Fields as FeedSnapshot, the other Fields of a Server never change)
+    fingerprints = dict()
+
+    for timestamp, servers in iter_replay_snapshots(source, snapshots):
+        candidates = []
+        for server_raw in servers:
+            server_id = server_raw.get("id", 0)
+            fingerprint = (server_raw.get("price"), server_raw.get("fixed_price"), server_raw.get("next_reduce_timestamp"),
+                           server_raw.get("specials"), server_raw.get("datacenter"))
+            if fingerprints.get(server_id) != fingerprint:
+                fingerprints[server_id] = fingerprint
+                candidates.append(server_raw)
+
+        for search in searches:
+            search.foundServers = []
+
+        # Nothing is displayed by the Workers, so the per-Property Results are not needed
+        run_searches(searches, candidates, verbose=False)
+
+        for search, matches in zip(searches, first_matches):
+            for analysis in search.foundServers:
+                if analysis.id not in matches:
+                    matches[analysis.id] = (timestamp, analysis.price, analysis.cpu_description, analysis.datacenter)
+
+    return first_matches
+
+
+def replay(source, searches, start=None, end=None, workers=1):
+    # Spread contiguous Ranges of Snapshots over a Process Pool
+    # Returns the Number of Snapshots and for every Search the first Match of every Server, as if hah.py had run on every Snapshot
+    snapshots = get_replay_snapshots(source, start, end)
+    if len(snapshots) == 0:
+        return 0, [dict() for search in searches]
+
+    definitions = [(search.label, search.cli_args) for search in searches]
+
+    # More Chunks than Workers, so that a slow Chunk does not keep the other Workers idle
+    chunk_count = min(len(snapshots), workers * 4 if workers > 1 else 1)
+    chunks = [snapshots[len(snapshots) * i // chunk_count:len(snapshots) * (i + 1) // chunk_count] for i in range(chunk_count)]
+
+    if workers > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(replay_chunk, [source] * len(chunks), chunks, [definitions] * len(chunks)))
+    else:
+        results = [replay_chunk(source, chunk, definitions) for chunk in chunks]
+
+    # Merge in chronological Order: the first Chunk in which a Server matched wins
+    first_matches = [dict() for search in searches]
+    for result in results:
+        for matches, chunk_matches in zip(first_matches, result):
+            for server_id, match in chunk_matches.items():
+                if server_id not in matches:
+                    matches[server_id] = match
+
+    return len(snapshots), first_matches
+
+
+def print_replay(searches, first_matches):
+    # Initialize Variable
+    total = 0
+
+    for search, matches in zip(searches, first_matches):
+        total += len(matches)
+        print(f"Search {search.label}: {len(matches)} notification(s)")
+
+        if OUTPUT_WRITER is not None:
+            for server_id, (timestamp, price, cpu, datacenter) in sorted(matches.items(), key=lambda item: (item[1][0], item[0])):
+                OUTPUT_WRITER.write({"search": search.label, "timestamp": timestamp, "first_notified": format_timestamp(timestamp),
+                                     "id": server_id, "price": price, "cpu": cpu, "datacenter": datacenter})
+            OUTPUT_WRITER.flush()
+        elif PRINT_VERBOSE and len(matches) > 0:
+            header = ["First notified", "Server", "Price", "CPU", "Datacenter"]
+            data = [[format_timestamp(timestamp), server_id, f"{price:.2f}", cpu, datacenter]
+                    for server_id, (timestamp, price, cpu, datacenter) in sorted(matches.items(), key=lambda item: (item[1][0], item[0]))]
+
+            from texttable import Texttable
+            t = Texttable()
+            t.set_max_width(0)
+            t.set_cols_dtype(["t"] * len(header))
+            t.add_rows([header] + data, header=True)
+            print(t.draw())
+
+    return total
+
+
+def rank_matches(search, verbose):
+    # Keep only the best --top Matches of a ranking Search (lowest Price per Unit first)
+    # A bounded Heap holds K Matches at a Time instead of sorting all of them, Ties keep the Order of the Auction List
+    if search.rank is None:
+        return
+
+    top = heapq.nsmallest(search.top, search.foundServers, key=lambda analysis: analysis.get_value(search.rank))
+
+    # The per-Property Results are only filled for the Matches that are displayed
+    if verbose:
+        for index, analysis in enumerate(top):
+            search.plan.explain(analysis)
+            top[index] = analysis.snapshot()
+
+    search.foundServers = top
+
+
+def report_search(search, dispatcher, show_label=False):
+    if show_label and PRINT_VERBOSE:
+        print(f"Search {search.label}: {len(search.foundServers)} matching Server(s)")
+
+    for analysis in search.foundServers:
+        if OUTPUT_WRITER is not None:
+            # One Record per Match instead of the Analysis Table and the Short Summary
+            # (the per-Criterion Results are filled here, the Analysis is written before the next Search reuses it)
+            search.plan.explain(analysis)
+            record = {"search": search.label, **analysis.get_record(search.plan)}
+            if search.rank is not None:
+                record["rank"] = search.rank
+                record["value"] = analysis.get_value(search.rank)
+            OUTPUT_WRITER.write(record)
+        else:
             # Display Complete Analysis
             if PRINT_VERBOSE:
                 print(analysis)
 
-            # Display Short Summary
-            print(analysis.get_header())
+            # Display Short Summary (with the Value for ranking Searches)
+            if search.rank is not None:
+                value = analysis.get_value(search.rank)
+                print(f"{analysis.get_header()} ({value:.2f} {Server.VALUE_METRICS[search.rank][2]})")
+            else:
+                print(analysis.get_header())
+
+        if not search.test_mode and not search.cli_args.digest:
+            # Queue one Notification per Provider (sent concurrently by the Dispatcher, the Message is rendered only once per Format)
+            for provider in search.providers:
+                if analysis.id in search.processed.get(provider, ()):
+                    continue
+
+                future = dispatcher.submit(search.get_notifier(provider), send_notification, analysis, search.cli_args.send_payload)
+                search.pendingNotifications.append((provider, [analysis], future))
+
+    # Digest: one Message for all Servers of this Search (split only if the Provider Limit requires it)
+    if not search.test_mode and search.cli_args.digest and len(search.foundServers) > 0:
+        # Providers with the same Limit and the same Servers share the Messages
+        digests = dict()
+
+        for provider in search.providers:
+            analyses = search.get_unsent(provider, search.foundServers)
+            if len(analyses) == 0:
+                continue
+
+            limit = PROVIDER_MESSAGE_LIMITS.get(provider)
+            key = (limit, tuple(analysis.id for analysis in analyses))
+            if key not in digests:
+                digests[key] = get_digest_messages(search.label, analyses, limit)
+
+            for title, html_message, text_message, messageAnalyses in digests[key]:
+                future = dispatcher.submit(search.get_notifier(provider), send_digest, title, html_message, text_message)
+                search.pendingNotifications.append((provider, messageAnalyses, future))
+
+
+def finish_search(search):
+    # Wait for the Notifications of this Search
+    # Only Servers whose Notification was sent successfully are marked as processed (for that Provider),
+    # the others are retried on the next Run
+    processedEntries = {provider: [] for provider in search.providers}
+    failedIDs = {provider: [] for provider in search.providers}
+    for provider, analyses, future in search.pendingNotifications:
+        if future.result():
+            processedEntries[provider].extend((analysis.id, analysis.price) for analysis in analyses)
+        else:
+            failedIDs[provider].extend(analysis.id for analysis in analyses)
+
+    search.pendingNotifications = []
+
+    for provider in search.providers:
+        if len(failedIDs[provider]) > 0:
+            print(f"Failed to send {len(failedIDs[provider])} Notification(s) via {provider} for Search {search.label} - will retry on the next run")
+
+        # Write all processed IDs of each Provider at once
+        if len(processedEntries[provider]) > 0:
+            search.states[provider].mark_processed(processedEntries[provider])
+
+    # One Entry per failed Notification
+    return [server_id for provider in search.providers for server_id in failedIDs[provider]]
+
+
+def run_once(cli_args, searches, session, store, cache, dispatcher, snapshot=None, archive=None, history=None, schedule=None):
+    # One complete Run: Download, Match and Notify
+    # Raises FeedError if the Auction List cannot be downloaded or parsed
+
+    # Messages of the previous Run are outdated (e.g. next_reduce in the Payload)
+    MESSAGE_CACHE.clear()
+
+    metrics = RunMetrics()
+    dispatcher.metrics = metrics
+
+    try:
+        process_feed(cli_args, searches, session, store, cache, dispatcher, metrics, snapshot, archive, history, schedule)
+        metrics.success = True
+    finally:
+        dispatcher.metrics = None
+
+        # Metrics are written for failed Runs as well (last_run_success is 0)
+        if cli_args.metrics_prom:
+            metrics.write_prometheus(cli_args.metrics_prom[0])
+
+        if cli_args.metrics_json:
+            metrics.write_json(cli_args.metrics_json[0])
+
+
+def process_feed(cli_args, searches, session, store, cache, dispatcher, metrics, snapshot=None, archive=None, history=None, schedule=None):
+    # Initialize Variable
+    columns = None
+
+    # Download the Auction List only once for all Searches
+    # A binary Auction List is memory-mapped instead (nothing to download or parse)
+    if cli_args.feed_binary:
+        data_url = cli_args.feed_binary[0]
+        with metrics.phase("download"):
+            columns = open_binary_feed(data_url)
+        digest = columns.source
+        metrics.count("feed_bytes", len(columns.buffer))
+    else:
+        data_url = cli_args.data_url[0]
+        with metrics.phase("download"):
+            body, digest = download_feed(session, data_url, cache, stream=cli_args.stream)
+
+    # Skip Parsing and Matching entirely if this exact Auction List was already processed by the same Searches (with the same Criteria)
+    consumer = "|".join([cli_args.state_db[0] if cli_args.state_db else "", *[f"{search.label}:{search.state_file}" for search in searches],
+                         get_criteria_digest(searches)])
+    test_mode = all(search.test_mode for search in searches)
+    if cache is not None and not test_mode and cache.is_seen(data_url, consumer, digest):
+        print("Auction list unchanged since last run - nothing to do")
+        metrics.count("feed_unchanged")
+        return
+
+    if not cli_args.feed_binary:
+        # An Auction List that was not modified since the last Download is only read from the Cache now
+        if body is None:
+            with metrics.phase("download"):
+                try:
+                    body, digest = cache.read_cached(data_url, stream=cli_args.stream)
+                except Exception as e:
+                    print('Failed to read cached auction list')
+                    print(e)
+                    raise FeedError(e)
+
+        if cli_args.stream:
+            body = metrics.count_items(body, "feed_bytes", size=len)
+        else:
+            metrics.count("feed_bytes", len(body))
+
+    with metrics.phase("state"):
+        for search in searches:
+            search.open(store)
+            search.foundServers = []
+            search.nearMisses = dict()
+
+    # Parse the Auction List only once for all Searches
+    # When streaming, Servers are parsed one at a time while they are being matched (the Parse Time is part of the next Phase)
+    if columns is not None:
+        servers = columns.servers
+    elif cli_args.stream:
+        servers = metrics.count_items(stream_servers(body), "servers_parsed")
+    elif archive is not None or history is not None:
+        with metrics.phase("parse"):
+            document = parse_document(body)
+            servers = document['server']
+            timestamp = time.time()
+
+        with metrics.phase("record"):
+            # Keep the History of the Auction List
+            if archive is not None and archive.add(timestamp, document) and PRINT_VERBOSE:
+                print(archive.get_summary())
+
+            # Record the Price of every Server
+            if history is not None:
+                history.ingest(timestamp, servers)
+    else:
+        with metrics.phase("parse"):
+            servers = parse_servers(body)
+
+    if not cli_args.stream:
+        metrics.count("servers_parsed", len(servers))
+
+    # Only process Servers that are new or changed since the previous Run
+    if snapshot is not None:
+        with metrics.phase("delta"):
+            servers = snapshot.compute_delta(servers)
+
+        metrics.count("servers_unchanged", len(snapshot.fingerprints) - len(servers))
+
+        if PRINT_VERBOSE:
+            print(snapshot.get_summary())
+
+    with metrics.phase("match"):
+        # Debug Mode always uses the Python Engine, since it displays the Analysis of every Server
+        if columns is not None and not cli_args.debug:
+            run_searches_columnar(searches, columns)
+        elif cli_args.engine[0] == "numpy" and not cli_args.debug:
+            # The Columnar Engine needs the whole Auction List
+            run_searches_columnar(searches, FeedColumns(list(servers), get_numpy()))
+        elif cli_args.match_workers[0] > 1 and not cli_args.debug and not cli_args.stream:
+            # Notifications of the previous Run (Watch Mode) are finished, their Threads must not exist while forking
+            dispatcher.release()
+            run_searches_parallel(searches, servers, cli_args.match_workers[0])
+        else:
+            run_searches(searches, servers, debug=cli_args.debug)
+
+    # Remember when the Servers that only miss a Search by their Price get cheaper
+    if schedule is not None:
+        with metrics.phase("schedule"):
+            metrics.count("near_misses", schedule.update(searches, changed=servers if snapshot is not None else None))
+
+    # Remove Servers that were already processed (one batched Lookup per Search)
+    with metrics.phase("dedup"):
+        for search in searches:
+            matches = len(search.foundServers)
+            search.remove_processed()
+
+            metrics.count_search(search.label, "matches", matches)
+            metrics.count_search(search.label, "new", len(search.foundServers))
+            metrics.count("servers_processed", matches - len(search.foundServers))
+
+            # Only the Servers that were not notified yet are ranked (otherwise a new Server that ranks
+            # below already notified ones would never be reported)
+            rank_matches(search, PRINT_VERBOSE)
+
+    # Initialize Variable
+    failedIDs = []
+
+    with metrics.phase("notify"):
+        # Notifications of all Searches are sent concurrently
+        for search in searches:
+            report_search(search, dispatcher, show_label=len(searches) > 1)
+
+        if OUTPUT_WRITER is not None:
+            OUTPUT_WRITER.flush()
+
+        for search in searches:
+            queued = sum(len(analyses) for provider, analyses, future in search.pendingNotifications)
+            searchFailedIDs = finish_search(search)
+            failedIDs.extend(searchFailedIDs)
+
+            metrics.count_search(search.label, "sent", queued - len(searchFailedIDs))
+            metrics.count_search(search.label, "failed", len(searchFailedIDs))
+
+    with metrics.phase("state"):
+        # Remember the Fingerprints for the next Run
+        # Servers whose Notification failed are forgotten, so that they are processed again on the next Run
+        if snapshot is not None:
+            snapshot.forget(failedIDs)
+            snapshot.save()
+            snapshot.advance()
+
+        # Remember that this Auction List was processed (unless some Notifications must be retried)
+        if cache is not None and not test_mode and len(failedIDs) == 0:
+            cache.mark_seen(data_url, consumer, digest)
+
+
+def watch(cli_args, searches, session, store, cache, dispatcher, snapshot=None, archive=None, history=None):
+    # Stay resident: Session, compiled Criteria, State and Notifiers are reused by every Run
+    interval = cli_args.interval[0]
+    jitter = cli_args.jitter[0]
+    max_backoff = max(cli_args.max_backoff[0], interval)
+
+    # Stop after the current Run when asked to (systemd sends SIGTERM)
+    stop = threading.Event()
+
+    def handle_signal(signum, frame):
+        print(f"Received {signal.Signals(signum).name} - stopping")
+        stop.set()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    # Next Price Reductions of the Servers that only miss a Search by their Price
+    schedule = ReduceSchedule(searches, cli_args.reduce_margin[0]) if cli_args.wake_on_reduce else None
+    grace = cli_args.reduce_grace[0]
+    reduce_interval = max(cli_args.reduce_interval[0], interval)
+
+    # Number of consecutive failed Runs
+    failures = 0
+
+    while not stop.is_set():
+        # Initialize Variable
+        reason = ""
+
+        try:
+            run_once(cli_args, searches, session, store, cache, dispatcher, snapshot, archive, history, schedule)
+            failures = 0
+            delay = interval + random.uniform(0, jitter)
+
+            # While the next Price Reduction of a Near Miss is known, poll at the relaxed --reduce-interval
+            # and wake up right after the Reduction instead
+            if schedule is not None:
+                now = time.time()
+                timestamp, count = schedule.get_next(now)
+                if timestamp is not None:
+                    delay = reduce_interval + random.uniform(0, jitter)
+                    if timestamp + grace - now < delay:
+                        delay = max(timestamp + grace - now, 1.0)
+                        reason = f" (price reduction of {count} server(s) at {format_timestamp(timestamp)})"
+        except Exception as e:
+            # Back off exponentially while the Auction List is not available, or while Runs fail for another Reason
+            # (State Database, Cache Directory, ...), the Daemon keeps running (KeyboardInterrupt / SystemExit are not caught)
+            if not isinstance(e, FeedError):
+                print(f"Run failed: {type(e).__name__}: {e}")
+
+            # The Exponent is capped so that a long Outage cannot overflow the Float Delay
+            failures += 1
+            delay = min(interval * 2 ** min(failures, 16), max_backoff)
+
+        sys.stdout.flush()
+
+        if PRINT_VERBOSE:
+            print(f"Next run in {delay:.0f}s{reason}")
+
+        stop.wait(delay)
+
+
+if __name__ == "__main__":
+    parser = get_parser()
+    cli_args = parser.parse_args()
+
+    # Set PRINT Level
+    set_print_level(cli_args)
+
+    # Records of the Matches instead of the Text Output
+    if cli_args.output_file and cli_args.output[0] == "text":
+        print("--output-file requires --output jsonl or --output csv")
+        exit(1)
+
+    if cli_args.output[0] != "text":
+        OUTPUT_WRITER = RecordWriter(cli_args.output[0], cli_args.output_file[0] if cli_args.output_file else None,
+                                     fields=RecordWriter.REPLAY_FIELDS if cli_args.replay else RecordWriter.MATCH_FIELDS)
+
+        # Keep the Records on stdout apart from all other Messages
+        if OUTPUT_WRITER.filename is None:
+            sys.stdout = sys.stderr
+
+    if PRINT_DEBUG:
+        print(f"Debug: {cli_args.debug} , Verbose: {cli_args.verbose} , Quiet: {cli_args.quiet}")
+
+    # Open the SQLite State Store if requested
+    store = StateStore(cli_args.state_db[0]) if cli_args.state_db else None
+
+    # One-Shot Import of a legacy State File
+    if cli_args.import_state:
+        if store is None:
+            print("--import-state requires --state-db")
+            exit(1)
+
+        count = store.import_state_file(cli_args.import_label[0], cli_args.import_state[0])
+        print(f"Imported {count} Server ID(s) from {cli_args.import_state[0]} as Search {cli_args.import_label[0]}")
+        store.close()
+        exit(0)
+
+    # Open the Snapshot Archive if requested
+    if (cli_args.archive_import or cli_args.archive_export) and not cli_args.archive:
+        print("--archive-import and --archive-export require --archive")
+        exit(1)
+
+    if (cli_args.archive or cli_args.history) and cli_args.stream:
+        print("--archive and --history cannot be combined with --stream (the whole auction list is needed)")
+        exit(1)
+
+    if cli_args.wake_on_reduce and not cli_args.watch:
+        print("--wake-on-reduce requires --watch")
+        exit(1)
+
+    if cli_args.feed_binary and (cli_args.stream or cli_args.archive or cli_args.history or cli_args.diff_state):
+        print("--feed-binary cannot be combined with --stream, --archive, --history or --diff-state (the auction list is not parsed)")
+        exit(1)
+
+    archive = SnapshotArchive(cli_args.archive[0]) if cli_args.archive else None
+
+    # Open the Price History if requested
+    if (cli_args.history_rebuild or cli_args.history_server or cli_args.history_drops or cli_args.history_lowest) and not cli_args.history:
+        print("--history-rebuild, --history-server, --history-drops and --history-lowest require --history")
+        exit(1)
+
+    if cli_args.history_rebuild and not cli_args.archive:
+        print("--history-rebuild requires --archive")
+        exit(1)
+
+    history = PriceHistory(cli_args.history[0]) if cli_args.history else None
+
+    # One-Shot Import of Snapshot Files (recorded in the Price History as well)
+    if cli_args.archive_import:
+        try:
+            import_snapshots(archive, cli_args.archive_import, history)
+        except FeedError:
+            exit(1)
+        archive.close()
+        if history is not None:
+            history.close()
+        exit(0)
+
+    # One-Shot Export of the Snapshot that was current at a given Time
+    if cli_args.archive_export:
+        timestamp = parse_timestamp(cli_args.archive_export[0])
+        document = archive.get(timestamp)
+        archive.close()
+        if document is None:
+            print(f"No snapshot in {cli_args.archive[0]} at or before {cli_args.archive_export[0]}")
+            exit(1)
+
+        print(json.dumps(document, separators=(",", ":")))
+        exit(0)
+
+    # One-Shot Rebuild of the Price History from the Snapshot Archive
+    if cli_args.history_rebuild:
+        for timestamp, document in archive.iter_snapshots():
+            history.ingest(timestamp, document['server'])
+        print(history.get_summary())
+        history.close()
+        archive.close()
+        exit(0)
+
+    # One-Shot Queries of the Price History
+    if cli_args.history_server or cli_args.history_drops or cli_args.history_lowest:
+        query_history(history, cli_args)
+        history.close()
+        exit(0)
+
+    # One-Shot Conversion of the Auction List into a binary Auction List (shared by the following Runs)
+    if cli_args.feed_binary_write:
+        try:
+            body, digest = download_feed(get_session(cli_args.data_url[0]), cli_args.data_url[0])
+            servers = parse_servers(body)
+        except FeedError:
+            exit(1)
+
+        columns = FeedColumns(servers, get_numpy())
+        columns.save(cli_args.feed_binary_write[0], hashlib.sha256(body).hexdigest())
+        if PRINT_VERBOSE:
+            print(f"Wrote {len(columns)} server(s) to {cli_args.feed_binary_write[0]}")
+        exit(0)
+
+    # Either many Searches from a Search Definition File or a single Search from the Command Line
+    if cli_args.searches:
+        searches = load_searches(cli_args.searches[0], parser, cli_args)
+    else:
+        searches = [Search("default", cli_args, cli_args.f)]
+
+    # Unchanged Servers are left out with --diff-state, so the best Matches could not be ranked
+    if cli_args.diff_state and any(search.rank is not None for search in searches):
+        print("--rank cannot be combined with --diff-state (the whole auction list is needed)")
+        exit(1)
+
+    # Backtest: replay archived Snapshots instead of downloading the Auction List
+    if cli_args.replay:
+        start = parse_timestamp(cli_args.replay_from[0]) if cli_args.replay_from else None
+        end = parse_timestamp(cli_args.replay_to[0]) if cli_args.replay_to else None
+
+        started = time.time()
+        count, first_matches = replay(cli_args.replay[0], searches, start, end, workers=max(1, cli_args.replay_workers[0]))
+        total = print_replay(searches, first_matches)
+        print(f"Replayed {count} snapshot(s) in {time.time() - started:.1f}s with {cli_args.replay_workers[0]} worker(s): {total} notification(s)")
+        exit(0)
+
+    # Reused by every Run (in Watch Mode)
+    session = get_session(cli_args.data_url[0])
+    cache = FeedCache(cli_args.cache_dir[0]) if cli_args.cache_dir else None
+
+    # Only process Servers that are new or changed since the previous Run
+    snapshot = None
+    if cli_args.diff_state and not all(search.test_mode for search in searches):
+        snapshot = FeedSnapshot(cli_args.diff_state[0], get_criteria_digest(searches))
+
+    # Notifications of all Searches are sent concurrently
+    dispatcher = NotificationDispatcher(workers=cli_args.notify_workers[0], rate=cli_args.notify_rate[0],
+                                        retries=cli_args.notify_retries[0], backoff=cli_args.notify_backoff[0])
+
+    # Initialize Variable
+    exit_code = 0
+
+    if cli_args.watch:
+        watch(cli_args, searches, session, store, cache, dispatcher, snapshot, archive, history)
+    else:
+        try:
+            run_once(cli_args, searches, session, store, cache, dispatcher, snapshot, archive, history)
+        except FeedError:
+            exit_code = 1
+
+    dispatcher.shutdown()
+
+    for search in searches:
+        search.close()
 
-            if not cli_args.test_mode:
-                # Send Notification
-                send_notification(notifier, analysis, cli_args.send_payload)
+    if store is not None:
+        store.close()
 
-                #  Write to File the ID that we processed
-                f.write(","+str(analysis.id))
+    if archive is not None:
+        archive.close()
 
-                # If a Database is going to be Introduced later on ...
-                # If Server is not Already in the Database with the same Price
-                #pass
-                #    #send_notification(notifier, analysis, cli_args.send_payload)
-                #    #f.write(","+str(analysis.id))
+    if history is not None:
+        history.close()
 
-    if not cli_args.test_mode:
-        f.close()
+    if exit_code != 0:
+        exit(exit_code)
@@ -112,9 +112,6 @@ store_raw_data() {
        add_section "#" "1" "Caching Hetzner Server List"
     fi
 
-    # Generate Timestamp
-    local ltimestamp=$(date +%Y-%m-%d_%Hh%M)
-
     # Download and Store the Data in Cache only once, so we don't hit Hetzner Servers too hard
     # !! DOES NOT WORK ANYMORE !!
     # curl -s https://www.hetzner.com/_resources/app/jsondata/live_data_sb.json | jq > ${APP_HOST_SEARCH_PATH}/live_data_sb.json
@@ -129,10 +126,80 @@ store_raw_data() {
     json_filename="live_data_sb_EUR.json"
 
     # Download and Store the Data in Cache only once, so we don't hit Hetzner Servers too hard
-    curl -s https://www.hetzner.com/_resources/app/data/app/${json_filename} | jq > ${APP_HOST_SEARCH_PATH}/${json_filename}
+    curl -s --compressed https://www.hetzner.com/_resources/app/data/app/${json_filename} > ${APP_HOST_SEARCH_PATH}/${json_filename}
+
+    # Keep a Historic View of the Data
+    if [[ "${HAH_ARCHIVE}" == "yes" ]]
+    then
+        # Add to the Snapshot Archive instead of keeping a Copy of every File
+        # Unchanged Lists are stored only once, changed Lists as a Delta against the previous one
+        # Older timestamped Copies can be imported with: ./app/hah.py --archive archive.db --archive-import *-live_data_sb_EUR.json
+        # The Price of every Server is recorded in the Price History at the same Time
+        run_hah "archive" --archive "${APP_SEARCH_PATH}/archive.db" --history "${APP_SEARCH_PATH}/history.db" --archive-import "${APP_SEARCH_PATH}/${json_filename}"
+    else
+        # Generate Timestamp
+        local ltimestamp=$(date +%Y-%m-%d_%Hh%M)
+
+        # Copy file so that we always have a Historic View
+        cp ${APP_HOST_SEARCH_PATH}/${json_filename} ${APP_HOST_SEARCH_PATH}/${ltimestamp}-${json_filename}
+    fi
 
-    # Copy file so that we always have a Historic View
-    cp ${APP_HOST_SEARCH_PATH}/${json_filename} ${APP_HOST_SEARCH_PATH}/${ltimestamp}-${json_filename}
+    # Convert the Data once into a binary File that all Searches of this Run memory-map instead of parsing the JSON again
+    if [[ "${HAH_BINARY_FEED}" == "yes" ]]
+    then
+        run_hah "binary" --data-url "file:///${APP_SEARCH_PATH}/${json_filename}" --feed-binary-write "${APP_SEARCH_PATH}/${json_filename%.json}.bin"
+    fi
+}
+
+##################################
+########### Run hah.py ###########
+##################################
+run_hah() {
+    local llabel="$1"
+    local lhahargs=("${@:2}")
+
+    # Decide how to Run
+    if [[ "${RUN_MODE}" == "container" ]]
+    then
+        # Define Container Name
+        local lcontainer="hetzner-auction-hunter-${llabel}"
+
+        # Stop and remove Container if it's currently running
+        $engine stop --ignore "${lcontainer}"
+        $engine rm --ignore "${lcontainer}"
+
+        # Run the new Container
+        $engine run --rm --replace \
+        --name="${lcontainer}" \
+        -v ${APP_HOST_DATA_PATH}:${APP_CONTAINER_DATA_PATH}:rw,z \
+        --net ${CONTAINER_NETWORK} \
+        --env-file "./.env" \
+        -e "NOTIFIERS_PUSHOVER_USER"="${NOTIFIERS_PUSHOVER_USER}" \
+        -e "NOTIFIERS_PUSHOVER_TOKEN"="${NOTIFIERS_PUSHOVER_TOKEN}" \
+        hetzner-auction-hunter:latest \
+        ${lhahargs[*]}
+    elif [[ "${RUN_MODE}" == "local" ]]
+    then
+        # Setup Python venv
+        if [[ ! -d "${toolpath}/venv" ]]
+        then
+            python3  -m venv venv
+        fi
+
+        # Activate Python venv
+        source "${toolpath}/venv/bin/activate"
+
+        # Install Python venv
+        pip install -q -r "${toolpath}/app/requirements.txt"
+
+        # Automatically Upgrade Python venv
+        pip install -q --upgrade -r "${toolpath}/app/requirements.txt"
+
+        # Run the APP
+        ./app/hah.py ${lhahargs[*]}
+    else
+        echo "Invalid value for RUN_MODE. Allowed Options are: <local> / <container>. Got <${RUN_MODE}>."
+    fi
 }
 
 ##################################
@@ -164,8 +231,14 @@ perform_search() {
 
     # Build list of Arguments for hah.py
     local lhahargs=()
-    lhahargs+=("--data-url")
-    lhahargs+=("file:///${APP_SEARCH_PATH}/${json_filename}")
+    if [[ "${HAH_BINARY_FEED}" == "yes" ]]
+    then
+        lhahargs+=("--feed-binary")
+        lhahargs+=("${APP_SEARCH_PATH}/${json_filename%.json}.bin")
+    else
+        lhahargs+=("--data-url")
+        lhahargs+=("file:///${APP_SEARCH_PATH}/${json_filename}")
+    fi
     lhahargs+=("-f")
     lhahargs+=("${APP_RESULTS_PATH}/${ltimestamp}-${lsearchlabel}.txt")
     lhahargs+=("--provider")
@@ -177,46 +250,65 @@ perform_search() {
         lhahargs+=("$larg")
     done
 
-    # Decide how to Run
-    if [[ "${RUN_MODE}" == "container" ]]
-    then
-        # Define Container Name
-        local lcontainer="hetzner-auction-hunter-${lsearchlabel}"
+    # Run the APP
+    run_hah "${lsearchlabel}" "${lhahargs[@]}"
+}
 
-        # Stop and remove Container if it's currently running
-        $engine stop --ignore "${lcontainer}"
-        $engine rm --ignore "${lcontainer}"
+##################################
+######### Queue Search ###########
+##################################
+# Same Arguments as perform_search, but the Search is only added to the Search Definition File
+# All queued Searches are then evaluated by a single hah.py Process in perform_queued_searches
+queue_search() {
+    local lsearchlabel="$1"
+    local lsearchcriteria="${@:2}"
+    echo "Queued Search Arguments: ${lsearchcriteria[*]}"
 
-        # Run the new Container
-        $engine run --rm --replace \
-        --name="${lcontainer}" \
-        -v ${APP_HOST_DATA_PATH}:${APP_CONTAINER_DATA_PATH}:rw,z \
-        --net ${CONTAINER_NETWORK} \
-        --env-file "./.env" \
-        -e "NOTIFIERS_PUSHOVER_USER"="${NOTIFIERS_PUSHOVER_USER}" \
-        -e "NOTIFIERS_PUSHOVER_TOKEN"="${NOTIFIERS_PUSHOVER_TOKEN}" \
-        hetzner-auction-hunter:latest \
-        ${lhahargs[*]}
-    elif [[ "${RUN_MODE}" == "local" ]]
-    then
-        # Setup Python venv
-        if [[ ! -d "${toolpath}/venv" ]]
-        then
-            python3  -m venv venv
-        fi
+    # Generate Timestamp
+    local ltimestamp=$(date +%Y-%m-%d_%Hh%M)
 
-        # Activate Python venv
-        source "${toolpath}/venv/bin/activate"
+    # Append Search as one JSON Line
+    jq -cn \
+       --arg label "${lsearchlabel}" \
+       --arg criteria "${lsearchcriteria[*]}" \
+       --arg state_file "${APP_RESULTS_PATH}/${ltimestamp}-${lsearchlabel}.txt" \
+       '{label: $label, criteria: $criteria, state_file: $state_file}' >> "${APP_HOST_SEARCH_PATH}/searches.json"
+}
 
-        # Install Python venv
-        pip install -q -r "${toolpath}/app/requirements.txt"
+##################################
+#### Perform Queued Searches #####
+##################################
+perform_queued_searches() {
+    # Nothing to do if no Search was queued
+    if [[ ! -s "${APP_HOST_SEARCH_PATH}/searches.json" ]]
+    then
+        return
+    fi
 
-        # Automatically Upgrade Python venv
-        pip install -q --upgrade -r "${toolpath}/app/requirements.txt"
+    # Build Section
+    if [ -n "${PRINT_CONFIGURATION}" ] && [ "${PRINT_CONFIGURATION}" == "yes" ]
+    then
+       add_section "#" "1" "Performing Queued Server Searches"
+    fi
 
-        # Run the APP
-        ./app/hah.py ${lhahargs[*]}
+    # Define JSON File
+    json_filename="live_data_sb_EUR.json"
+
+    # Build list of Arguments for hah.py
+    local lhahargs=()
+    if [[ "${HAH_BINARY_FEED}" == "yes" ]]
+    then
+        lhahargs+=("--feed-binary")
+        lhahargs+=("${APP_SEARCH_PATH}/${json_filename%.json}.bin")
     else
-        echo "Invalid value for RUN_MODE. Allowed Options are: <local> / <container>. Got <${RUN_MODE}>."
+        lhahargs+=("--data-url")
+        lhahargs+=("file:///${APP_SEARCH_PATH}/${json_filename}")
     fi
+    lhahargs+=("--searches")
+    lhahargs+=("${APP_SEARCH_PATH}/searches.json")
+    lhahargs+=("--provider")
+    lhahargs+=("${HAH_PROVIDER}")
+
+    # Run the APP
+    run_hah "searches" "${lhahargs[@]}"
 }
@@ -23,8 +23,14 @@ mkdir -p ${APP_HOST_RESULTS_PATH}
 # Store RAW Data only Once
 store_raw_data
 
+# Start from an empty List of queued Searches
+: > "${APP_HOST_SEARCH_PATH}/searches.json"
+
 # Perform Searches that the User defined
 source "${toolpath}/search.sh"
 
+# Perform all queued Searches in a single hah.py Process
+perform_queued_searches
+
 # Unset all Variables that we imported
 unset $(grep -v '^#' ${toolpath}/.env | sed -E 's/(.*)=.*/\1/' | xargs)